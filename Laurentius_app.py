@@ -2,82 +2,126 @@ import numpy as np
 np.bool8 = np.bool
 import streamlit as st
 import pandas as pd
+from collections import OrderedDict
 from bokeh.layouts import gridplot
-from create_orgel_plot import create_orgel_plot
-from create_aussen_plot import create_aussen_plot
-from create_bankreihe_plot import create_bankreihe_plot
+from create_sensor_plot import create_sensor_plot
 # from create_orgel_plot_temp_rH60 import create_orgel_temp_rH60
 from create_slope_plot import create_slope_plot
 from create_tslope_plot import create_tslope_plot
 from bokeh.io import export_svgs
+from data_access import load_range, load_window, load_date_bounds, table_signature, find_site_table
+from plot_sources import create_sensor_source
+from calendar_markers import create_marker_source
+from sensor_registry import get_sites, get_site_sensors
+from figure_cache import get_range_group, cached_model, release_layout
 
 # Set the page layout to wide
 st.set_page_config(layout="wide")
 
 
-# Read Parquet files
-orgel_df = pd.read_parquet("orgel.parquet", engine='pyarrow')
-aussen_df = pd.read_parquet("aussen.parquet", engine='pyarrow')
-bankreihe_df = pd.read_parquet("bankreihe.parquet", engine='pyarrow')
-nutzheiz_df = pd.read_parquet("nutzheiz.parquet", engine='pyarrow')
-grundheiz_df = pd.read_parquet("grundheiz.parquet", engine='pyarrow')
-
-# Ensure datetime index
-orgel_df['date'] = pd.to_datetime(orgel_df['date'])
-aussen_df['date'] = pd.to_datetime(aussen_df['date'])
-bankreihe_df['date'] = pd.to_datetime(bankreihe_df['date'])
+# Columns drawn by the plots, only these are read from the store
+sensor_columns = ['date', 'temp', 'rH', 'aH']
 
 def main():
     st.title('Weather Data Analysis')
 
+    # Site and sensors from the registry, only the selected sensors are loaded and plotted
+    site = st.selectbox('Select Site', get_sites())
+    site_sensors = get_site_sensors(site)
+    titles = {sensor['name']: sensor['title'] for sensor in site_sensors}
+    selected_names = st.multiselect('Select Sensors', list(titles), default=list(titles), format_func=titles.get)
+    sensors = [sensor for sensor in site_sensors if sensor['name'] in selected_names]
+    if not sensors:
+        st.info('Select at least one sensor')
+        return
+
+    # Only the first and last month of the heated sensor are read to get the selectable range
+    heated = [sensor for sensor in sensors if sensor['plot']['heating_plot']]
+    first_date, last_date = load_date_bounds((heated or sensors)[0]['name'])
+
     # Date range selection using a single range picker
     date_range_key = 'date_range'
     date_range = st.date_input('Select Date Range',
-                               min_value=orgel_df['date'].min().date(),
-                               max_value=orgel_df['date'].max().date(),
-                               value=(orgel_df['date'].min().date(), orgel_df['date'].max().date()),
+                               min_value=first_date.date(),
+                               max_value=last_date.date(),
+                               value=(first_date.date(), last_date.date()),
                                key=date_range_key)
 
     start_date = pd.Timestamp(date_range[0])
     end_date = pd.Timestamp(date_range[1]) + pd.Timedelta(days=1)
 
     if st.button('Reset Date Range'):
-        start_date = orgel_df['date'].min()
-        end_date = orgel_df['date'].max() + pd.Timedelta(days=1)
+        start_date = first_date
+        end_date = last_date + pd.Timedelta(days=1)
         date_range = (start_date.date(), end_date.date())
 
     # Checkbox to show Sunday markers
     show_sunday_marker = st.checkbox('Show Sunday Markers')
-    show_hum_box_orgel = st.checkbox('Show Humidity Boundaries Orgel')
-    show_hum_box_bankreihe = st.checkbox('Show Humidity Boundaries Bankreihe')
+    show_hum_box = {sensor['name']: st.checkbox(f"Show Humidity Boundaries {sensor['title']}")
+                    for sensor in sensors if sensor['plot']['humidity_box']}
 
     # Sliders
     # Slider for bounding box limits
-    lower_rH_orgel, upper_rH_orgel = st.slider('Select Bounding Humidity Limits for Orgel', 0, 100, (45, 70), key='limit_rh_orgel')
-    lower_temp_orgel, upper_temp_orgel = st.slider('Select Bounding Humidity Limits for Orgel', 0, 100, (45, 70), key='limit_temp_orgel')
-    lower_rh_bank, upper_rh_bank = st.slider('Select Bounding Humidity Limits for Bankreihe ', 0, 100, (45, 70), key='limit_rh_bank')
-
-    # Filter dataframe based on selected date range
-    filtered_aussen = aussen_df.loc[(aussen_df['date'] >= start_date) & (aussen_df['date'] < end_date)]
-    filtered_orgel = orgel_df.loc[(orgel_df['date'] >= start_date) & (orgel_df['date'] < end_date)]
-    filtered_bankreihe = bankreihe_df.loc[(bankreihe_df['date'] >= start_date) & (bankreihe_df['date'] < end_date)]
-
-    # Create Bokeh plot using the imported function
-    p1, p1_x_range, p1_y_range = create_aussen_plot(filtered_aussen, start_date, end_date, show_sunday_marker)
-
-    # Update y-axis range based on slider input
-
-    p2 = create_orgel_plot(filtered_orgel, start_date, end_date, show_sunday_marker, p1_x_range, show_hum_box_orgel,lower_rH_orgel,upper_rH_orgel)
-    p3 = create_bankreihe_plot(filtered_bankreihe, start_date, end_date, show_sunday_marker, p1_x_range, show_hum_box_bankreihe,lower_rh_bank,upper_rh_bank)
+    rh_limits = {sensor['name']: st.slider(f"Select Bounding Humidity Limits for {sensor['title']}", 0, 100, (45, 70),
+                                           key=f"limit_rh_{sensor['name']}")
+                 for sensor in sensors if sensor['plot']['humidity_box']}
+
+    # Only the selected panels are built. Each figure is cached per session, keyed on its inputs and the
+    # signature of its data, so changing one panel's options rebuilds only that figure.
+    # The heating plot needs the heating intervals and base heating of the site, it is left out without them
+    nutzheiz, grundheiz = find_site_table(site, 'nutzheiz'), find_site_table(site, 'grundheiz')
+    show_heating_plot = (bool(heated) and nutzheiz is not None and grundheiz is not None
+                         and st.checkbox('Show Heating Plot', value=True))
+    group = get_range_group(st.session_state.setdefault('figure_cache', OrderedDict()), start_date, end_date)
+    x_range = group['x_range']
+
+    # One Sunday marker source shared by all linked plots
+    marker_source = None
+    if show_sunday_marker:
+        marker_source = cached_model(group, ('markers',), lambda: create_marker_source(start_date, end_date))
+
+    # Read only the month partitions and columns needed for the selected date range, cached across reruns.
+    # Long ranges are read from the coarsest rollup that still gives two points per pixel of the widest plot.
+    # The lines are downsampled to about twice the plot width,
+    # so narrowing the date range re-renders the window at up to full resolution.
+    min_points = 2 * 1200
+    plots = []
+    heating_plots = []
+    for sensor in sensors:
+        name = sensor['name']
+        signature = table_signature(name)
+        load_sensor = lambda name=name: load_window(name, start_date, end_date, sensor_columns, min_points)
+        with_heating_plot = show_heating_plot and sensor['plot']['heating_plot']
+        # A heated sensor shares one source with its heating plot, sampled for the wider heating plot (1200 px)
+        source = None
+        if with_heating_plot:
+            source = cached_model(group, ('source', name, signature),
+                                  lambda: create_sensor_source(load_sensor(), ['temp', 'rH', 'aH'], 2 * 1200))
+
+        # The slider bounds only matter while the humidity box is shown
+        hum_box = show_hum_box.get(name, False)
+        lower_rH, upper_rH = rh_limits[name] if hum_box else (45, 70)
+        plot_key = ('plot', name, signature, source is not None, show_sunday_marker, hum_box, lower_rH, upper_rH)
+        plots.append([cached_model(group, plot_key, lambda: create_sensor_plot(
+            load_sensor(), sensor, start_date, end_date, show_sunday_marker, x_range, hum_box, lower_rH, upper_rH,
+            source=source, marker_source=marker_source))])
+
+        if with_heating_plot:
+            heating_key = ('heating', name, signature, table_signature(nutzheiz), table_signature(grundheiz),
+                           show_sunday_marker)
+            heating_plots.append([cached_model(group, heating_key, lambda: create_tslope_plot(
+                load_sensor(), start_date, end_date, show_sunday_marker, x_range,
+                load_range(nutzheiz, start_date, end_date, ['date', 'interval_bool']),
+                load_range(grundheiz, start_date, end_date, ['date', 'base_heat']),
+                source=source, marker_source=marker_source))])
 
     #p4 = create_orgel_plot_temp(filtered_orgel, start_date, end_date, show_sunday_marker, p1_x_range)
-    p5 = create_tslope_plot(filtered_orgel, start_date, end_date, show_sunday_marker, p1_x_range, nutzheiz_df,grundheiz_df)
 
-    
     # Display Bokeh plot using st.bokeh_chart
     st.subheader('Efficio Daten Auswertung')
-    #st.bokeh_chart(gridplot([[p1],[p2],[p3],[p4],[p5]], toolbar_location="above",sizing_mode='stretch_both'))
-    st.bokeh_chart(gridplot([[p1],[p2],[p3],[p5]], toolbar_location="above",sizing_mode='stretch_both'))
+    layout = gridplot(plots + heating_plots, toolbar_location="above",sizing_mode='stretch_both')
+    st.bokeh_chart(layout)
+    release_layout(layout)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,296 @@
+import numpy as np
+np.bool8 = np.bool
+import pandas as pd
+from bokeh.io import curdoc
+from bokeh.layouts import column, gridplot, row
+from bokeh.models import CheckboxGroup, DataRange1d, DateRangeSlider, Div, RangeSlider, Select
+from create_sensor_plot import create_sensor_plot, sensor_axis_bounds
+from create_tslope_plot import create_tslope_plot, heating_interval_data
+from data_access import load_range, load_window, load_date_bounds, table_signature, find_site_table
+from plot_sources import create_sensor_source, sensor_source_data
+from calendar_markers import create_marker_source, marker_data
+from sensor_registry import get_sites, get_site_sensors
+
+# Bokeh server version of Laurentius_app.py, run with: python Laurentius_server.py
+# The figures are built once per session. Widget changes update the existing sources, ranges and annotations,
+# so only the changed values are sent to the browser instead of the whole page.
+
+# Columns drawn by the plots, only these are read from the store
+sensor_columns = ['date', 'temp', 'rH', 'aH']
+# Two points per pixel of the widest plot (1200 px)
+min_points = 2 * 1200
+# Live mode shows the last days at full resolution and streams readings appended by live_ingest.py
+LIVE_DAYS = 7
+# Readings kept in the rolling window (one every 15 minutes)
+LIVE_ROLLOVER = LIVE_DAYS * 24 * 4
+LIVE_POLL_MS = 10000
+# Zooming or panning reloads the shown range at a fitting resolution once the range has been still this long
+RELOAD_DELAY_MS = 300
+
+def _to_timestamp(value):
+    # DateRangeSlider values arrive as milliseconds since epoch
+    if isinstance(value, (int, float)):
+        return pd.Timestamp(value, unit='ms')
+    return pd.Timestamp(value)
+
+def load_heating(heating_tables, start_date, end_date):
+    """
+    Load the heating intervals (nutzheiz) and base heating (grundheiz) of a site for a date range.
+    """
+    nutzheiz, grundheiz = heating_tables
+    return (load_range(nutzheiz, start_date, end_date, ['date', 'interval_bool']),
+            load_range(grundheiz, start_date, end_date, ['date', 'base_heat']))
+
+def create_panels(sensors, start_date, end_date):
+    """
+    Build the plots of the given sensors with all optional annotations, hidden until switched on.
+
+    Parameters:
+    - sensors: List of sensor entries from sensor_registry
+    - start_date: Start of the initial range
+    - end_date: End of the initial range
+
+    Returns:
+    - List of panel dictionaries (sensor, plot, source, heating plot and interval source if any),
+      the shared marker source and the list of marker renderers
+    """
+    x_range = DataRange1d()
+    marker_source = create_marker_source(start_date, end_date)
+    panels = []
+    for sensor in sensors:
+        df = load_window(sensor['name'], start_date, end_date, sensor_columns, min_points)
+        source = create_sensor_source(df, ['temp', 'rH', 'aH'], min_points)
+        plot = create_sensor_plot(df, sensor, start_date, end_date, True, x_range, sensor['plot']['humidity_box'],
+                                  source=source, marker_source=marker_source)
+        panel = {'sensor': sensor, 'plot': plot, 'source': source, 'stale': False}
+        heating_tables = (find_site_table(sensor['site'], 'nutzheiz'), find_site_table(sensor['site'], 'grundheiz'))
+        # Without the heating tables of the site the heating plot is left out
+        if sensor['plot']['heating_plot'] and None not in heating_tables:
+            panel['heating_tables'] = heating_tables
+            panel['heating_plot'] = create_tslope_plot(
+                df, start_date, end_date, True, x_range, *load_heating(heating_tables, start_date, end_date),
+                source=source, marker_source=marker_source)
+            panel['interval_source'] = panel['heating_plot'].select_one({'name': 'heating_intervals'}).data_source
+        panels.append(panel)
+
+    markers = []
+    for panel in panels:
+        for plot in (panel['plot'], panel.get('heating_plot')):
+            if plot is not None:
+                markers.append(plot.select_one({'name': 'calendar_markers'}))
+    return panels, marker_source, markers
+
+def update_panel(panel, start_date, end_date):
+    """
+    Load a new date range into the existing sources and ranges of a panel.
+
+    Parameters:
+    - panel: Panel dictionary from create_panels
+    - start_date: Start of the range
+    - end_date: End of the range
+    """
+    name = panel['sensor']['name']
+    panel['signature'] = table_signature(name)
+    df = load_window(name, start_date, end_date, sensor_columns, min_points)
+    # The window length changes with the range, so the columns are replaced as a whole
+    panel['source'].data = sensor_source_data(df, ['temp', 'rH', 'aH'], min_points)
+    panel['last_date'] = df['date'].iloc[-1] if len(df) else pd.Timestamp(start_date)
+    plot = panel['plot']
+    for name, (start, end) in sensor_axis_bounds(df).items():
+        axis_range = plot.y_range if name == 'temp' else plot.extra_y_ranges[name]
+        axis_range.update(start=start, end=end)
+    if 'interval_source' in panel:
+        panel['interval_source'].data = heating_interval_data(
+            *load_heating(panel['heating_tables'], start_date, end_date))
+    panel['stale'] = False
+
+def stream_panel(panel):
+    """
+    Stream the readings stored after the last shown one into a panel, keeping a rolling window of LIVE_ROLLOVER rows.
+
+    Parameters:
+    - panel: Panel dictionary from create_panels, showing raw readings
+    """
+    name = panel['sensor']['name']
+    signature = table_signature(name)
+    if signature == panel.get('signature'):
+        return
+    panel['signature'] = signature
+    new_df = load_range(name, panel['last_date'] + pd.Timedelta(1), pd.Timestamp.now() + pd.Timedelta(days=1),
+                        sensor_columns)
+    if new_df.empty:
+        return
+    # Only the new rows are sent to the browser, the oldest rows drop out of the window
+    panel['source'].stream({column: new_df[column].to_numpy() for column in sensor_columns}, rollover=LIVE_ROLLOVER)
+    plot = panel['plot']
+    for range_name, (start, end) in sensor_axis_bounds(new_df).items():
+        axis_range = plot.y_range if range_name == 'temp' else plot.extra_y_ranges[range_name]
+        axis_range.update(start=min(axis_range.start, start), end=max(axis_range.end, end))
+    panel['last_date'] = new_df['date'].iloc[-1]
+
+def create_site_layout(doc, site):
+    """
+    Build the plots and widgets of a site and connect their callbacks.
+
+    Parameters:
+    - doc: Bokeh document the periodic and timeout callbacks are added to
+    - site: Name of the site
+
+    Returns:
+    - Tuple of (layout, close), close removes the callbacks of the site from the document
+    """
+    sensors = get_site_sensors(site)
+    heated = [sensor for sensor in sensors if sensor['plot']['heating_plot']]
+    first_date, last_date = load_date_bounds((heated or sensors)[0]['name'])
+    start_date = first_date.normalize()
+    end_date = last_date.normalize() + pd.Timedelta(days=1)
+
+    panels, marker_source, markers = create_panels(sensors, start_date, end_date)
+    humidity_panels = [panel for panel in panels if panel['sensor']['plot']['humidity_box']]
+    x_range = panels[0]['plot'].x_range
+    loaded_range = (start_date, end_date)
+
+    # Widgets
+    date_slider = DateRangeSlider(title='Select Date Range', start=start_date, end=end_date,
+                                  value=(start_date, end_date), step=1, format='%d %B %Y', width=800)
+    sensor_select = CheckboxGroup(labels=[sensor['title'] for sensor in sensors], active=list(range(len(sensors))))
+    options = CheckboxGroup(labels=['Show Sunday Markers', 'Show Heating Plot', 'Live'], active=[1] if heated else [])
+    hum_box_select = CheckboxGroup(labels=[f"Show Humidity Boundaries {panel['sensor']['title']}"
+                                           for panel in humidity_panels], active=[])
+    rh_sliders = [RangeSlider(title=f"Select Bounding Humidity Limits for {panel['sensor']['title']}", start=0,
+                              end=100, value=(45, 70), step=1, width=400) for panel in humidity_panels]
+    boxes = [panel['plot'].select_one({'name': 'humidity_box'}) for panel in humidity_panels]
+
+    def selected_range():
+        start, end = date_slider.value
+        return _to_timestamp(start).normalize(), _to_timestamp(end).normalize() + pd.Timedelta(days=1)
+
+    def update_visibility(attr, old, new):
+        for i, panel in enumerate(panels):
+            visible = i in sensor_select.active
+            if visible and panel['stale']:
+                update_panel(panel, *loaded_range)
+            panel['plot'].visible = visible
+            if 'heating_plot' in panel:
+                panel['heating_plot'].visible = visible and 1 in options.active
+        for marker in markers:
+            marker.visible = 0 in options.active
+        for i, box in enumerate(boxes):
+            box.visible = i in hum_box_select.active
+
+    def load_view(start, end):
+        nonlocal loaded_range
+        loaded_range = (start, end)
+        marker_source.data = marker_data(start, end)
+        for i, panel in enumerate(panels):
+            # Hidden panels are updated when they are shown again
+            if i in sensor_select.active:
+                update_panel(panel, start, end)
+            else:
+                panel['stale'] = True
+
+    def update_range(attr, old, new):
+        load_view(*selected_range())
+
+    pending_reload = None
+
+    def reload_view():
+        nonlocal pending_reload
+        pending_reload = None
+        # Live mode streams after the last shown reading, so it keeps its window
+        if 2 in options.active or x_range.start is None or x_range.end is None:
+            return
+        start, end = _to_timestamp(x_range.start), _to_timestamp(x_range.end)
+        loaded_start, loaded_end = loaded_range
+        # Panning within the loaded window (padded by the auto range) or zooming in a little needs no reload
+        margin = (loaded_end - loaded_start) * x_range.range_padding
+        if (start >= loaded_start - margin and end <= loaded_end + margin
+                and end - start > (loaded_end - loaded_start) / 2):
+            return
+        load_view(start, end)
+
+    def schedule_reload(attr, old, new):
+        nonlocal pending_reload
+        # Zooming and panning change the range many times a second, only the last change is loaded
+        if pending_reload is not None:
+            doc.remove_timeout_callback(pending_reload)
+        pending_reload = doc.add_timeout_callback(reload_view, RELOAD_DELAY_MS)
+
+    live_callback = None
+
+    def stream_live():
+        for i, panel in enumerate(panels):
+            if i in sensor_select.active:
+                stream_panel(panel)
+            else:
+                panel['stale'] = True
+
+    def update_live(attr, old, new):
+        nonlocal live_callback
+        live = 2 in options.active
+        if live and live_callback is None:
+            # Jump to the last LIVE_DAYS of the stored readings, then keep streaming
+            end = max(load_date_bounds(panel['sensor']['name'])[1] for panel in panels).normalize()
+            start = end - pd.Timedelta(days=LIVE_DAYS)
+            date_slider.update(end=max(_to_timestamp(date_slider.end), end), value=(start, end))
+            update_range(None, None, None)
+            live_callback = doc.add_periodic_callback(stream_live, LIVE_POLL_MS)
+        elif not live and live_callback is not None:
+            doc.remove_periodic_callback(live_callback)
+            live_callback = None
+
+    def update_box(box):
+        def callback(attr, old, new):
+            box.update(bottom=new[0], top=new[1])
+        return callback
+
+    def close():
+        if live_callback is not None:
+            doc.remove_periodic_callback(live_callback)
+        if pending_reload is not None:
+            doc.remove_timeout_callback(pending_reload)
+
+    # value_throttled fires once the slider is released, not for every intermediate position
+    date_slider.on_change('value_throttled', update_range)
+    x_range.on_change('start', schedule_reload)
+    x_range.on_change('end', schedule_reload)
+    sensor_select.on_change('active', update_visibility)
+    options.on_change('active', update_visibility, update_live)
+    hum_box_select.on_change('active', update_visibility)
+    for slider, box in zip(rh_sliders, boxes):
+        box.update(bottom=slider.value[0], top=slider.value[1])
+        slider.on_change('value', update_box(box))
+    update_visibility(None, None, None)
+
+    plots = [[panel['plot']] for panel in panels] + [[panel['heating_plot']] for panel in panels
+                                                     if 'heating_plot' in panel]
+    controls = column(date_slider, row(sensor_select, options, hum_box_select), row(*rh_sliders))
+    return column(controls, gridplot(plots, toolbar_location="above")), close
+
+def main(doc):
+    sites = get_sites()
+    site_select = Select(title='Select Site', value=sites[0], options=sites)
+    site_layout, close_site = create_site_layout(doc, sites[0])
+    root = column(Div(text='<h1>Weather Data Analysis</h1>'), site_select, site_layout)
+
+    def update_site(attr, old, new):
+        nonlocal close_site
+        # The plots of the new site replace the old ones, their callbacks are removed with them
+        close_site()
+        root.children[2], close_site = create_site_layout(doc, new)
+
+    site_select.on_change('value', update_site)
+    doc.add_root(root)
+    doc.title = 'Efficio Daten Auswertung'
+
+# bokeh serve runs this file as a module named bokeh_app_<id>
+if __name__.startswith('bokeh_app'):
+    main(curdoc())
+
+# Started as a script, since the bokeh serve command imports bokeh before the numpy shim above
+if __name__ == "__main__":
+    from bokeh.server.server import Server
+    server = Server({'/': main}, port=5006)
+    server.start()
+    server.io_loop.add_callback(server.show, '/')
+    server.io_loop.start()
@@ -0,0 +1,62 @@
+import pandas as pd
+from time_slice import sort_by_date, utc_dates
+from sensor_registry import site_table_name
+
+# Largest clock difference between two loggers for their readings to count as simultaneous
+ALIGN_TOLERANCE = pd.Timedelta(minutes=5)
+# Columns of every sensor kept in the wide table
+WIDE_COLUMNS = ['temp', 'rH', 'aH']
+
+def wide_table_name(site):
+    """
+    Name of the wide table of a site in the store (e.g. 'st_laurentius_wide').
+    """
+    return site_table_name(site, 'wide')
+
+def align_sensors(frames, columns=WIDE_COLUMNS, base=None, tolerance=ALIGN_TOLERANCE):
+    """
+    Align several sensors on the timestamps of one of them, matching the nearest reading within a tolerance.
+
+    Unlike an exact merge on date, readings of loggers whose clocks differ by a few seconds or minutes are still
+    matched. Readings of the base sensor without a match within the tolerance get NaN for the other sensor.
+
+    Parameters:
+    - frames: Dictionary mapping sensor name to a DataFrame with a 'date' column and the given columns
+    - columns: Columns of each sensor to align (default: temp, rH, aH)
+    - base: Name of the sensor whose timestamps are used, the first one if None (default: None)
+    - tolerance: Largest time difference of matched readings as Timedelta (default: 5 minutes)
+
+    Returns:
+    - DataFrame sorted by time (see sort_by_date) with the columns date and <column>_<sensor> for every sensor
+      and column
+    """
+    base = base or next(iter(frames))
+
+    def prepare(name):
+        df = sort_by_date(frames[name][['date'] + list(columns)])
+        # Matched on UTC, so the two passes of the repeated DST hour are matched with the same pass of the other
+        df['date_utc'] = utc_dates(df['date'])
+        return df.rename(columns={column: f'{column}_{name}' for column in columns})
+
+    wide_df = prepare(base)
+    for name in frames:
+        if name != base:
+            wide_df = pd.merge_asof(wide_df, prepare(name).drop(columns='date'), on='date_utc',
+                                    direction='nearest', tolerance=tolerance)
+    return wide_df.drop(columns='date_utc')
+
+def sensor_from_wide(wide_df, name, columns=WIDE_COLUMNS):
+    """
+    Get the columns of one sensor from a wide table under their plain names.
+
+    Parameters:
+    - wide_df: DataFrame from align_sensors
+    - name: Name of the sensor (e.g. 'orgel')
+    - columns: Columns to get (default: temp, rH, aH)
+
+    Returns:
+    - DataFrame with date and the columns, without the rows where the sensor had no matching reading
+    """
+    df = wide_df[['date'] + [f'{column}_{name}' for column in columns]]
+    df.columns = ['date'] + list(columns)
+    return df.dropna(subset=list(columns))
@@ -1,13 +1,137 @@
+import numpy as np
 import pandas as pd
+from data_access import load_window
+from align_sensors import align_sensors, wide_table_name
+from sensor_registry import ENERGY_SENSORS
+from energy_integration import HEAT_LOSS_COEFFICIENT, MAX_GAP, integrate_intervals, energy_intervals
+from time_slice import utc_dates
 
-def calculate_energy_consumption(aussen_df, orgel_df,heating_temp=9):
+# Heating season evaluated by default
+SEASON = ('2023-11-01', '2024-03-31')
+
+def load_energy_input(start_date, end_date, site='St. Laurentius'):
+    """
+    Load the raw 'aussen' and 'orgel' temperatures of a site for the energy integration.
+
+    Temperatures are read from the aligned wide table of the site if it exists.
+
+    Parameters:
+    - start_date: Start of the range (inclusive)
+    - end_date: End of the range (exclusive)
+    - site: Site whose outside and inside sensors are loaded, see sensor_registry.ENERGY_SENSORS (default: St. Laurentius)
+
+    Returns:
+    - Tuple of DataFrames (aussen_df, orgel_df) with the columns date and temp
+    """
+    energy_sensors = ENERGY_SENSORS[site]
+    wide_table = wide_table_name(site)
+    # No rollup bucket fits into a zero length, so load_window reads the raw readings
+    aussen_df = load_window(energy_sensors['outside'], start_date, end_date, ['date', 'temp'],
+                            max_bucket=pd.Timedelta(0), wide_table=wide_table)
+    orgel_df = load_window(energy_sensors['inside'], start_date, end_date, ['date', 'temp'],
+                           max_bucket=pd.Timedelta(0), wide_table=wide_table)
+    # The compact store returns float32, the energy is summed over the exact decimal values in float64
+    aussen_df = aussen_df[['date', 'temp']].astype({'temp': float}).round(3)
+    orgel_df = orgel_df[['date', 'temp']].astype({'temp': float}).round(3)
+    return aussen_df, orgel_df
+
+def merge_energy_input(aussen_df, orgel_df):
+    """
+    Merge the 'aussen' and 'orgel' temperatures once, to evaluate any number of seasons and set points on.
+
+    Parameters:
+    - aussen_df: DataFrame containing 'aussen' data (date, temp), see load_energy_input
+    - orgel_df: DataFrame containing 'orgel' data (date, temp), see load_energy_input
+
+    Returns:
+    - DataFrame with columns date, temp_aussen, temp_orgel and temp_diff (orgel - aussen)
+    """
+    # Readings are matched within the alignment tolerance, so small clock differences do not drop rows
+    merged_df = align_sensors({'orgel': orgel_df, 'aussen': aussen_df}, ['temp']).dropna()
+    merged_df['temp_diff'] = (merged_df['temp_orgel'] - merged_df['temp_aussen']).round(2)
+    return merged_df
+
+def _median_interval_hours(dates):
+    # Fewer than two readings span no interval
+    if len(dates) < 2:
+        return 0.0
+    return dates.diff().median().total_seconds() / 3600
+
+def _max_gap(dates, max_gap=None):
+    """
+    Longest interval that is not a gap: max_gap if given, else MAX_GAP or twice the median spacing of the dates
+    if that is longer, so sparser readings (e.g. hourly) are not taken for gaps.
+    """
+    if max_gap is not None:
+        return max_gap
+    return max(MAX_GAP, 2 * pd.Timedelta(hours=_median_interval_hours(dates)))
+
+def energy_sweep(merged_df, heating_temps, seasons=(SEASON,), coefficient=HEAT_LOSS_COEFFICIENT, max_gap=None):
+    """
+    Evaluate the base heating energy for a grid of set points and seasons at once.
+
+    For every season the heating power of all set points is integrated in one broadcast over the intervals of the
+    season, with the trapezoidal rule of energy_integration. The values are the same as calculate_energy_consumption
+    gives for each pair.
+
+    Parameters:
+    - merged_df: DataFrame from merge_energy_input
+    - heating_temps: Set points in °C below which base heating is assumed
+    - seasons: Sequence of (start_date, end_date) tuples, both inclusive (default: SEASON)
+    - coefficient: Heat loss coefficient in kWh/K (default: 3.1)
+    - max_gap: Longest interval that is not a gap as Timedelta, MAX_GAP or twice the median spacing of the dates
+      if None (default: None)
+
+    Returns:
+    - DataFrame with one row per season and set point: season_start, season_end, heating_temp, intervals,
+      total_time_hours, average_delta_k (NaN without base heating) and energy_kwh
+    """
+    heating_temps = np.asarray(heating_temps, dtype=float)
+    results = []
+    for season_start, season_end in seasons:
+        season_df = merged_df[(merged_df['date'] >= season_start) & (merged_df['date'] <= season_end)]
+        temp_orgel = season_df['temp_orgel'].to_numpy()
+        temp_diff = season_df['temp_diff'].to_numpy()
+        # Interval lengths in UTC as in energy_intervals
+        dates = utc_dates(season_df['date'])
+        season_gap = _max_gap(season_df['date'], max_gap)
+
+        # (set points x rows) mask of the readings with base heating at each set point
+        heating = (temp_orgel[np.newaxis, :] <= heating_temps[:, np.newaxis]) & (temp_diff > 0)
+        _, energy, _ = integrate_intervals(dates, coefficient * np.where(heating, temp_diff, 0.0), season_gap)
+        _, heating_hours, _ = integrate_intervals(dates, heating, season_gap)
+        energy_kwh = energy.sum(axis=1)
+        total_time_hours = heating_hours.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            average_delta_k = np.where(total_time_hours > 0, energy_kwh / coefficient / total_time_hours, np.nan)
+
+        results.append(pd.DataFrame({
+            'season_start': pd.Timestamp(season_start),
+            'season_end': pd.Timestamp(season_end),
+            'heating_temp': heating_temps,
+            'intervals': heating.sum(axis=1),
+            'total_time_hours': total_time_hours,
+            'average_delta_k': average_delta_k,
+            'energy_kwh': energy_kwh,
+        }))
+    return pd.concat(results, ignore_index=True)
+
+def calculate_energy_consumption(aussen_df, orgel_df,heating_temp=9, max_gap=None, season=SEASON,
+                                 coefficient=HEAT_LOSS_COEFFICIENT):
     """
     Calculate the energy consumption based on temperature differences between 'aussen' and 'orgel'.
-    
+
+    The heating power is integrated over the actual timestamps with energy_integration.energy_intervals,
+    so gaps in the data add no energy.
+
     Parameters:
-    - aussen_df: DataFrame containing 'aussen' data
-    - orgel_df: DataFrame containing 'orgel' data
+    - aussen_df: DataFrame containing 'aussen' data (date, temp), see load_energy_input
+    - orgel_df: DataFrame containing 'orgel' data (date, temp), see load_energy_input
     - heating_temp: temperature point for which base heating is assumed
+    - max_gap: longest interval that is not a gap as Timedelta, MAX_GAP or twice the median spacing of the dates
+      if None (default: None)
+    - season: (start_date, end_date) of the evaluated heating season, both inclusive (default: SEASON)
+    - coefficient: heat loss coefficient in kWh/K (default: 3.1)
 
     Returns:
     - New DataFrame with columns temp_orgel, temp_aussen, and temp_diff
@@ -16,40 +140,27 @@ def calculate_energy_consumption(aussen_df, orgel_df,heating_temp=9):
     - Total time in hours for Temp Orgel < heating_temp
     """
     # Filter data for the specified date range
-    start_date = '2023-11-01'
-    end_date = '2024-03-31'
+    start_date, end_date = season
     aussen_df = aussen_df[(aussen_df['date'] >= start_date) & (aussen_df['date'] <= end_date)]
     orgel_df = orgel_df[(orgel_df['date'] >= start_date) & (orgel_df['date'] <= end_date)]
 
-    # Merge the data on the 'date' column
-    merged_df = pd.merge(aussen_df, orgel_df, on='date', suffixes=('_aussen', '_orgel'))
+    # Align the data on the 'orgel' timestamps, matching the nearest 'aussen' reading within the tolerance
+    merged_df = merge_energy_input(aussen_df, orgel_df)
 
-    # Calculate the temperature difference
-    merged_df['temp_diff'] = (merged_df['temp_orgel'] - merged_df['temp_aussen']).round(2)
+    # Integrate the heating power over the intervals between readings
+    intervals_df = energy_intervals(merged_df, heating_temp, coefficient, _max_gap(merged_df['date'], max_gap))
+    energy_consumption = intervals_df['energy_kwh'].sum()
+    total_time_hours = intervals_df['heating_hours'].sum()
 
-    # Set temp_diff to zero where temp_orgel is below heating_temp 
+    # Calculate the average temperature difference, 0 without base heating
+    average_delta_k = energy_consumption / coefficient / total_time_hours if total_time_hours > 0 else 0.0
+
+    # Set temp_diff to zero where temp_orgel is above heating_temp or warmer outside
     merged_df.loc[(merged_df['temp_orgel'] > heating_temp) | (merged_df['temp_aussen'] > merged_df['temp_orgel']), 'temp_diff'] = 0
 
   # Add base_heat column
     merged_df['base_heat'] = merged_df['temp_diff'] > 0
 
-  # Filter rows where orgel temperature is below heating_temp and temperature outside is less than temperature inside
-    filtered_df = merged_df[merged_df['temp_diff'] > 0]
-
-    # Calculate the number of time intervals where the orgel temperature is below heating_temp
-    count_delta_k = filtered_df['temp_diff'].count()
-
-    # Calculate the average temperature difference
-    average_delta_k = filtered_df['temp_diff'].mean()
-
-    # Calculate the total time in hours (assuming each interval represents 0.25 hours)
-    total_time_hours = count_delta_k * 0.25
-
-    # Integrate the temperature difference over time and multiply by 3.1 = 2.2 + 0.9 kWh/K from HL to get energy consumption in kWh
-    energy_integral = 3.1 * average_delta_k * total_time_hours
-
-    energy_consumption = energy_integral
-
     # Create the new DataFrame with required columns
     result_df = merged_df[['date', 'temp_orgel', 'temp_aussen', 'temp_diff','base_heat']]
     result_df = result_df.rename(columns={'temp_diff': f'temp_diff_sub_{heating_temp}'})
@@ -0,0 +1,280 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+np.bool8 = np.bool
+import pandas as pd
+from process_file import process_file, calculate_derived_columns
+from calculate_temp_rh_60 import calculate_temp_rh_60_array
+from baseload_energy_calculation import calculate_energy_consumption
+from create_aussen_plot import create_aussen_plot
+from create_orgel_plot import create_orgel_plot
+from create_bankreihe_plot import create_bankreihe_plot
+from create_slope_plot import create_slope_plot
+from create_tslope_plot import create_tslope_plot
+from sensor_store import write_partitioned
+from sensor_registry import SENSORS, ENERGY_SENSORS, get_sites, get_site_sensors, site_table_name
+from rollups import write_rollups
+from align_sensors import align_sensors, wide_table_name
+
+# Benchmarks of ingest, energy calculation, plot builders and dashboard reruns on synthetic logger series of
+# 1 to 50 years. Results are written as JSON, e.g. to compare two commits:
+#   python benchmark_suite.py --output before.json
+#   python benchmark_suite.py --output after.json --compare before.json
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(REPO_DIR, 'Laurentius_app.py')
+RESULTS_FILE = 'benchmark_results.json'
+YEARS = (1, 5, 10, 25, 50)
+REPEATS = 3
+# Excel exports are limited to 1,048,576 rows (about 30 years of 15-minute readings) and slow to write,
+# so the full process_file including the Excel read is only timed for these sizes
+EXCEL_YEARS = (1,)
+
+# Start and interval of the synthetic series
+SYNTHETIC_START = pd.Timestamp('2023-01-01')
+READING_INTERVAL = '15min'
+# Climate of the synthetic series, close to the monthly and hourly means of the St. Laurentius loggers:
+# (mean, seasonal and daily amplitude, noise) of the temperature in °C and of the relative humidity in %
+SYNTHETIC_CLIMATE = {
+    'aussen': {'temp': (13.2, 9.3, 2.6, 2.5), 'rH': (75.0, -17.0, -8.0, 6.0)},
+    'orgel': {'temp': (17.8, 7.2, 0.5, 0.8), 'rH': (56.0, -3.0, 0.0, 4.0)},
+    'bankreihe': {'temp': (17.3, 6.9, 0.4, 0.8), 'rH': (58.0, -3.0, 0.0, 4.0)},
+}
+# Warm-up heating of the synthetic inside sensors on Sunday mornings of the heating season
+WARMUP_HOURS = (6, 12)
+WARMUP_KELVIN = 4.0
+
+def synthetic_dates(years):
+    """
+    15-minute timestamps from SYNTHETIC_START over a number of years.
+    """
+    return pd.date_range(SYNTHETIC_START, periods=int(years * 365.25 * 96), freq=READING_INTERVAL)
+
+def warmup_mask(dates):
+    """
+    Readings during the warm-up heating: Sunday mornings between October and April.
+    """
+    return (dates.dayofweek == 6) & (dates.hour >= WARMUP_HOURS[0]) & (dates.hour < WARMUP_HOURS[1]) & \
+           ((dates.month >= 10) | (dates.month <= 4))
+
+def synthetic_readings(name, years, seed=0):
+    """
+    Synthetic raw logger readings of a sensor with a seasonal and a daily cycle plus noise.
+
+    Parameters:
+    - name: Name of the sensor, a key of SYNTHETIC_CLIMATE
+    - years: Length of the series in years
+    - seed: Seed of the noise (default: 0)
+
+    Returns:
+    - DataFrame with columns date, temp and rH like process_file.read_logger_file
+    """
+    dates = synthetic_dates(years)
+    rng = np.random.default_rng(seed + sorted(SYNTHETIC_CLIMATE).index(name))
+    # Warmest in mid July, and in the afternoon
+    seasonal = np.cos(2 * np.pi * (dates.dayofyear.to_numpy() - 200) / 365.25)
+    daily = np.cos(2 * np.pi * (dates.hour.to_numpy() + dates.minute.to_numpy() / 60 - 15) / 24)
+
+    values = {}
+    for column, (mean, seasonal_amplitude, daily_amplitude, noise) in SYNTHETIC_CLIMATE[name].items():
+        values[column] = mean + seasonal_amplitude * seasonal + daily_amplitude * daily + rng.normal(0, noise,
+                                                                                                    len(dates))
+    if name != 'aussen':
+        values['temp'] = values['temp'] + WARMUP_KELVIN * warmup_mask(dates)
+    return pd.DataFrame({'date': dates, 'temp': values['temp'].round(2), 'rH': np.clip(values['rH'], 5, 100).round(1)})
+
+def synthetic_warmup(dates):
+    """
+    Synthetic warm-up heating table like warmup.warmup, with interval_bool 1 during the warm-up heating.
+    """
+    return pd.DataFrame({'date': dates, 'interval_bool': warmup_mask(pd.DatetimeIndex(dates)).astype(int)})
+
+def write_logger_excel(df, file_path):
+    """
+    Write readings in the column layout of the logger exports (date, rH and temp at positions 0, 3 and 5).
+    """
+    pd.DataFrame({'Datum': df['date'], 'a': 0, 'b': 0, 'rH': df['rH'], 'c': 0, 'temp': df['temp']}).to_excel(
+        file_path, index=False, engine='openpyxl')
+
+def best_time(function, repeats=REPEATS):
+    """
+    Best wall time of several runs of function.
+
+    Returns:
+    - Tuple of (seconds, result of the last run)
+    """
+    times = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start_time)
+    return min(times), result
+
+def quiet(function):
+    """
+    Wrap a function so it runs without printing.
+    """
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return function()
+    return run
+
+def build_store(frames, nutz_df, grund_df):
+    """
+    Write the sensor tables, rollups, wide tables and heating tables to the store of the working directory as
+    init.py does.
+    """
+    for name, df in frames.items():
+        write_partitioned(df, name)
+        write_rollups(df, name)
+    for site in get_sites():
+        site_frames = {sensor['name']: frames[sensor['name']] for sensor in get_site_sensors(site)}
+        write_partitioned(align_sensors(site_frames, base=ENERGY_SENSORS.get(site, {}).get('inside')),
+                          wide_table_name(site))
+    for site in ENERGY_SENSORS:
+        write_partitioned(grund_df, site_table_name(site, 'grundheiz'))
+        write_partitioned(nutz_df, site_table_name(site, 'nutzheiz'))
+
+def benchmark_app(frames, nutz_df, grund_df):
+    """
+    Time a first run and an unchanged rerun of Laurentius_app.main against a store of the given frames.
+
+    Returns:
+    - Dictionary mapping 'app_first_run' and 'app_rerun' to seconds
+    """
+    from streamlit.testing.v1 import AppTest
+
+    working_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as store_root:
+        os.chdir(store_root)
+        try:
+            build_store(frames, nutz_df, grund_df)
+            app = AppTest.from_file(APP_PATH, default_timeout=600)
+            first_run, _ = best_time(app.run, repeats=1)
+            rerun, _ = best_time(app.run, repeats=1)
+            if app.exception:
+                raise RuntimeError(f"Laurentius_app failed: {[exception.value for exception in app.exception]}")
+        finally:
+            os.chdir(working_dir)
+    return {'app_first_run': first_run, 'app_rerun': rerun}
+
+def benchmark_size(years, repeats=REPEATS, with_app=True):
+    """
+    Run all benchmarks on synthetic series of one length.
+
+    Parameters:
+    - years: Length of the synthetic series in years
+    - repeats: Number of runs, the best one is reported (default: 3)
+    - with_app: Whether to time the dashboard runs (default: True)
+
+    Returns:
+    - List of dictionaries with benchmark, years, rows and seconds
+    """
+    raw = {sensor['name']: synthetic_readings(sensor['name'], years) for sensor in SENSORS}
+    rows = len(raw['orgel'])
+    timings = {}
+
+    if years in EXCEL_YEARS:
+        with tempfile.TemporaryDirectory() as excel_dir:
+            file_path = os.path.join(excel_dir, 'orgel.xlsx')
+            write_logger_excel(raw['orgel'], file_path)
+            timings['process_file'], _ = best_time(lambda: process_file(file_path, True), repeats)
+
+    frames = {}
+    for sensor in SENSORS:
+        name = sensor['name']
+        timings[f'calculate_derived_columns_{name}'], frames[name] = best_time(
+            lambda: calculate_derived_columns(raw[name], sensor['temp_60']), repeats)
+    orgel_df, aussen_df, bankreihe_df = frames['orgel'], frames['aussen'], frames['bankreihe']
+    timings['calculate_temp_rh_60'], _ = best_time(
+        lambda: calculate_temp_rh_60_array(orgel_df['rH'], orgel_df['aH'], orgel_df['temp']), repeats)
+
+    season = (orgel_df['date'].iloc[0], orgel_df['date'].iloc[-1])
+    timings['calculate_energy_consumption'], grund_df = best_time(
+        quiet(lambda: calculate_energy_consumption(aussen_df, orgel_df, heating_temp=9.5, season=season)), repeats)
+    nutz_df = synthetic_warmup(orgel_df['date'])
+
+    # The builders get the whole series, as for the widest date range of the dashboard
+    start_date, end_date = season[0], season[1] + pd.Timedelta(days=1)
+    builders = {
+        'create_aussen_plot': lambda: create_aussen_plot(aussen_df, start_date, end_date, False),
+        'create_orgel_plot': lambda: create_orgel_plot(orgel_df, start_date, end_date, False, None, True, 45, 70),
+        'create_bankreihe_plot': lambda: create_bankreihe_plot(bankreihe_df, start_date, end_date, False, None, True,
+                                                               45, 70),
+        'create_slope_plot': lambda: create_slope_plot(orgel_df, start_date, end_date, False, None),
+        'create_tslope_plot': lambda: create_tslope_plot(orgel_df, start_date, end_date, False, None, nutz_df,
+                                                         grund_df),
+    }
+    for name, builder in builders.items():
+        timings[name], _ = best_time(builder, repeats)
+
+    if with_app:
+        timings.update(benchmark_app(frames, nutz_df, grund_df))
+
+    return [{'benchmark': name, 'years': years, 'rows': rows, 'seconds': seconds} for name, seconds in timings.items()]
+
+def git_commit():
+    """
+    Commit of the working tree, None outside of a git checkout.
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline_path):
+    """
+    Print the ratio of each benchmark to the same benchmark and size in an earlier results file.
+    """
+    with open(baseline_path) as file:
+        baseline = json.load(file)
+    baseline_seconds = {(result['benchmark'], result['years']): result['seconds'] for result in baseline['results']}
+    print(f"\nCompared to {baseline_path} (commit {baseline.get('commit')}), ratio > 1 is slower:")
+    for result in results:
+        key = (result['benchmark'], result['years'])
+        if baseline_seconds.get(key):
+            print(f"{result['benchmark']:<36}{result['years']:>4} years{result['seconds'] / baseline_seconds[key]:>8.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ingest, energy calculation and dashboard reruns.')
+    parser.add_argument('--years', type=float, nargs='+', default=YEARS, help='Lengths of the synthetic series')
+    parser.add_argument('--repeats', type=int, default=REPEATS, help='Runs per benchmark, the best one is reported')
+    parser.add_argument('--output', default=RESULTS_FILE, help='JSON file the results are written to')
+    parser.add_argument('--compare', help='Earlier results file to compare with')
+    parser.add_argument('--no-app', action='store_true', help='Skip the dashboard runs')
+    args = parser.parse_args()
+
+    results = []
+    for years in args.years:
+        years = int(years) if float(years).is_integer() else years
+        for result in benchmark_size(years, args.repeats, not args.no_app):
+            print(f"{result['benchmark']:<36}{years:>4} years{result['rows']:>10} rows{result['seconds']:>10.3f} s")
+            results.append(result)
+
+    report = {
+        'commit': git_commit(),
+        'created': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'repeats': args.repeats,
+        'results': results,
+    }
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
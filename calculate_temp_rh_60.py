@@ -1,5 +1,5 @@
-from magnus import magnus_formula
-from scipy.optimize import newton
+import numpy as np
+from psychrometrics import temperature_for_rh
 
 def calculate_temp_rh_60(rh, ah, initial_temp, tolerance=0.0001, max_iterations=100):
     """
@@ -16,14 +16,31 @@ def calculate_temp_rh_60(rh, ah, initial_temp, tolerance=0.0001, max_iterations=
     - Temperature in Celsius that achieves the desired 60% RH for the given AH
     """
     if rh > 60:
-        rh_desired = 0.6
-        rh_decimal = rh / 100.0
+        return float(temperature_for_rh(np.array([ah]), 60, np.array([initial_temp]), tolerance, max_iterations)[0])
+    else:
+        return initial_temp
 
-        def f(temp):
-            e_s = magnus_formula(temp)
-            e_a = ah * 8314.3 * (temp + 273.15) / 18.016 / (10 ** 5)
-            return (e_a / e_s) - rh_desired
+def calculate_temp_rh_60_array(rh, ah, initial_temp, tolerance=0.0001, max_iterations=100):
+    """
+    Vectorized version of calculate_temp_rh_60 that solves all rows with rH > 60 % in one array Newton run.
 
-        return newton(f, initial_temp, tol=tolerance, maxiter=max_iterations)
-    else:
-        return initial_temp
\ No newline at end of file
+    Parameters:
+    - rh: Array of relative humidity in percentage
+    - ah: Array of absolute humidity in g/m³
+    - initial_temp: Array of temperatures in Celsius, used as initial guess
+    - tolerance: Tolerance for Newton's method (default: 0.0001)
+    - max_iterations: Maximum number of iterations for Newton's method (default: 100)
+
+    Returns:
+    - Array of temperatures in Celsius that achieve 60% RH, initial_temp where rH <= 60 %
+    """
+    rh = np.asarray(rh, dtype=float)
+    ah = np.asarray(ah, dtype=float)
+    result = np.array(initial_temp, dtype=float)
+
+    mask = rh > 60
+    if not mask.any():
+        return result
+
+    result[mask] = temperature_for_rh(ah[mask], 60, result[mask], tolerance, max_iterations)
+    return result
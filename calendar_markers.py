@@ -0,0 +1,82 @@
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from bokeh.models import ColumnDataSource, Range1d
+
+# Weekdays marked in the plots (Monday = 0 ... Sunday = 6)
+SERVICE_WEEKDAYS = (6,)
+# Additional marked days such as holidays or special services, as 'YYYY-MM-DD' strings
+SERVICE_DAYS = ()
+
+@lru_cache(maxsize=64)
+def find_marker_days(start_date, end_date, weekdays=SERVICE_WEEKDAYS, extra_days=SERVICE_DAYS):
+    """
+    Find the marked days (service weekdays and extra days) between start_date and end_date.
+
+    Parameters:
+    - start_date: Start of the range (inclusive)
+    - end_date: End of the range (inclusive)
+    - weekdays: Tuple of marked weekdays, Monday = 0 ... Sunday = 6 (default: SERVICE_WEEKDAYS)
+    - extra_days: Tuple of additionally marked days as 'YYYY-MM-DD' strings (default: SERVICE_DAYS)
+
+    Returns:
+    - Sorted DatetimeIndex of the marked days
+    """
+    start_date = pd.Timestamp(start_date)
+    end_date = pd.Timestamp(end_date)
+    days = pd.date_range(start_date, end_date, freq='D')
+    marked_days = days[days.dayofweek.isin(weekdays)]
+
+    extra_days = pd.DatetimeIndex(pd.to_datetime(list(extra_days)))
+    extra_days = extra_days[(extra_days >= start_date.normalize()) & (extra_days <= end_date)]
+    return marked_days.union(extra_days)
+
+def marker_data(start_date, end_date, weekdays=SERVICE_WEEKDAYS, extra_days=SERVICE_DAYS):
+    """
+    One whole-day box per marked day, as held by the ColumnDataSource of create_marker_source.
+
+    Parameters:
+    - start_date: Start of the range (inclusive)
+    - end_date: End of the range (inclusive)
+    - weekdays: Tuple of marked weekdays, Monday = 0 ... Sunday = 6 (default: SERVICE_WEEKDAYS)
+    - extra_days: Tuple of additionally marked days as 'YYYY-MM-DD' strings (default: SERVICE_DAYS)
+
+    Returns:
+    - Dictionary with the columns left and right
+    """
+    days = find_marker_days(pd.Timestamp(start_date), pd.Timestamp(end_date), tuple(weekdays), tuple(extra_days))
+    # Boxes are clipped to the range so they do not widen the auto-ranged x axis
+    right = np.minimum((days + pd.Timedelta(days=1)).to_numpy(), pd.Timestamp(end_date).to_datetime64())
+    return {'left': days.to_numpy(), 'right': right}
+
+def create_marker_source(start_date, end_date, weekdays=SERVICE_WEEKDAYS, extra_days=SERVICE_DAYS):
+    """
+    Create a ColumnDataSource with one whole-day box per marked day, to be shared by all linked plots.
+
+    Parameters:
+    - start_date: Start of the range (inclusive)
+    - end_date: End of the range (inclusive)
+    - weekdays: Tuple of marked weekdays, Monday = 0 ... Sunday = 6 (default: SERVICE_WEEKDAYS)
+    - extra_days: Tuple of additionally marked days as 'YYYY-MM-DD' strings (default: SERVICE_DAYS)
+
+    Returns:
+    - ColumnDataSource with the columns left and right
+    """
+    return ColumnDataSource(marker_data(start_date, end_date, weekdays, extra_days))
+
+def add_calendar_markers(plot, marker_source, fill_color='green'):
+    """
+    Draw the marked days of a marker source as one quad glyph spanning the full height of the plot.
+
+    Parameters:
+    - plot: Bokeh figure
+    - marker_source: ColumnDataSource from create_marker_source
+    - fill_color: Fill color of the boxes (default: 'green')
+
+    Returns:
+    - GlyphRenderer of the markers
+    """
+    plot.extra_y_ranges["marker_range"] = Range1d(0, 1)
+    return plot.quad(left='left', right='right', bottom=0, top=1, source=marker_source, fill_color=fill_color,
+                     fill_alpha=0.1, line_color=None, y_range_name="marker_range", level='underlay',
+                     name='calendar_markers')
@@ -0,0 +1,148 @@
+from bokeh.plotting import figure
+from bokeh.models import HoverTool, BoxAnnotation, LinearAxis, Range1d, Span, DatetimeTickFormatter
+from plot_sources import create_sensor_source
+from calendar_markers import create_marker_source, add_calendar_markers
+from rollups import column_min, column_max
+
+# x-Axis formats of the registry tick_format option
+TICK_FORMATS = {
+    # Format for the different levels of zoom
+    'calendar': dict(hours=["%d %B %Y %H:%M"], days=["%d %B %Y"], months=["%B %Y"], years=["%Y"]),
+    # Full timestamp on every tick
+    'timestamp': dict(hours=["%d %B %Y-%H:%M"], days=["%d %B %Y-%H:%M"], months=["%d %B %Y-%H:%M"],
+                      years=["%d %B %Y-%H:%M"]),
+}
+
+def sensor_axis_bounds(df):
+    """
+    Bounds of the temperature, relative humidity and absolute humidity axes for a sensor window.
+
+    Parameters:
+    - df: DataFrame with temp, rH and aH (raw or rollup)
+
+    Returns:
+    - Dictionary mapping 'temp', 'rh_range' and 'ah_range' to (start, end)
+    """
+    return {
+        'temp': (column_min(df, "temp")-5, column_max(df, "temp")+5),
+        'rh_range': (0.9* column_min(df, "rH"), 1.1 * column_max(df, "rH")),
+        'ah_range': (0.9* column_min(df, "aH"), 1.1 * column_max(df, "aH")),
+    }
+
+def create_sensor_plot(df, sensor, start_date, end_date, show_sunday_marker, x_range=None, show_hum_box=False,
+                       lower_rH=45, upper_rH=70, source=None, marker_source=None):
+    """
+    Create the temperature / relative humidity / absolute humidity plot of a sensor from its registry entry.
+
+    Parameters:
+    - df: DataFrame with date, temp, rH and aH (raw or rollup), already sliced to the selected date range
+    - sensor: Sensor entry from sensor_registry
+    - start_date: Start of the selected range
+    - end_date: End of the selected range
+    - show_sunday_marker: Whether to mark the Sundays
+    - x_range: x range to link the plot to, a new one is created if None (default: None)
+    - show_hum_box: Whether to draw the humidity boundary box, if the sensor offers one (default: False)
+    - lower_rH: Lower boundary of the humidity box in % (default: 45)
+    - upper_rH: Upper boundary of the humidity box in % (default: 70)
+    - source: ColumnDataSource with date, temp, rH and aH, created from df if None (default: None)
+    - marker_source: ColumnDataSource from create_marker_source, created if None (default: None)
+
+    Returns:
+    - Bokeh figure
+    """
+    filtered_df = df
+    options = sensor['plot']
+    bounds = sensor_axis_bounds(filtered_df)
+
+    # Define plot size optimized for A4 paper
+    plot_width = 800
+    plot_height = 800
+
+    # Create Bokeh plot
+    figure_options = {} if x_range is None else {'x_range': x_range}
+    plot = figure(title=sensor['title'], x_axis_label='Time', width=plot_width, height=plot_height,
+                  x_axis_type='datetime', tools="pan,box_zoom,reset,save", **figure_options)
+
+    plot.yaxis.axis_label = 'Temperature (°C)'
+
+    # Customize axis labels and title font sizes for readability
+    plot.title.text_font_size = '16pt'
+    plot.xaxis.axis_label_text_font_size = '14pt'
+    plot.yaxis.axis_label_text_font_size = '14pt'
+    plot.xaxis.major_label_text_font_size = '12pt'
+    plot.yaxis.major_label_text_font_size = '12pt'
+
+    plot.y_range = Range1d(*bounds['temp'])
+
+    # x-Axis format
+    plot.xaxis.formatter = DatetimeTickFormatter(**TICK_FORMATS[options['tick_format']])
+    plot.xaxis.major_label_orientation = 3.1415 / 4
+    plot.xaxis.ticker.desired_num_ticks = 10
+
+    # Plot temperature
+    # One source with only the drawn columns, shared by all lines (and linked plots if passed in)
+    if source is None:
+        source = create_sensor_source(filtered_df, ['temp', 'rH', 'aH'], 2 * plot.width)
+    temp_line = plot.line('date', 'temp', source=source, legend_label=u"\u03B8", line_width=2, color='red')
+    plot.add_tools(HoverTool(renderers=[temp_line], tooltips=[
+        ('Date', '@date{%F %H:%M}'),
+        ('Temperature', '@temp{0.2f} °C')
+    ], formatters={'@date': 'datetime'}, mode='vline'))
+
+    for location in options['reference_temps']:
+        horizontal_line = Span(location=location, dimension='width', line_color='black', line_width=1,
+                               line_dash='dashed')
+        plot.renderers.extend([horizontal_line])
+
+    # Add a second y-axis for relative humidity
+    rh_range = Range1d(*bounds['rh_range'])
+    plot.extra_y_ranges["rh_range"] = rh_range
+    rh_axis = LinearAxis(y_range_name="rh_range", axis_label="Relative Humidity (%)")
+    rh_axis.axis_label_text_font_size = '14pt'
+    rh_axis.major_label_text_font_size = '12pt'
+    plot.add_layout(rh_axis, 'right')
+
+    # Plot relative humidity
+    rh_line = plot.line('date', 'rH', source=source, legend_label='rH', line_width=2,
+                        color='blue', y_range_name="rh_range")
+    plot.add_tools(HoverTool(renderers=[rh_line], tooltips=[
+        ('Date', '@date{%F %H:%M}'),
+        ('Relative Humidity', '@rH{0.2f} %')
+    ], formatters={'@date': 'datetime'}, mode='vline'))
+
+    if options['humidity_box'] and show_hum_box:
+        # Create BoxAnnotation for the humidity boundaries
+        box_annotation = BoxAnnotation(top=upper_rH, bottom=lower_rH, fill_alpha=0.1, fill_color='blue', y_range_name="rh_range",
+                                       name='humidity_box')
+        plot.add_layout(box_annotation)
+
+    # Add extra y-axis for Absolute Humidity
+    ah_range = Range1d(*bounds['ah_range'])
+    plot.extra_y_ranges["ah_range"] = ah_range
+    ah_axis = LinearAxis(y_range_name="ah_range", axis_label="Absolute Humidity (g/m³)")
+    ah_axis.axis_label_text_font_size = '14pt'
+    ah_axis.major_label_text_font_size = '12pt'
+    plot.add_layout(ah_axis, 'right')
+
+    # Plot absolute humidity
+    ah_line = plot.line('date', 'aH', source=source, legend_label='aH',
+                        line_width=2, color='green', y_range_name="ah_range")
+    plot.add_tools(HoverTool(renderers=[ah_line], tooltips=[
+        ('Date', '@date{%F %H:%M}'),
+        ('Absolute Humidity', '@aH{0.2f} g/m³')
+    ], formatters={'@date': 'datetime'}, mode='vline'))
+
+    # Add Sunday markers
+    if show_sunday_marker:
+        if marker_source is None:
+            marker_source = create_marker_source(start_date, end_date)
+        add_calendar_markers(plot, marker_source)
+
+    # Style the plot
+    plot.legend.location = "top_left"
+    plot.legend.click_policy = "hide"
+
+    plot.xgrid.grid_line_color = None
+    plot.ygrid.grid_line_color = None
+
+    return plot
@@ -1,20 +1,12 @@
 import pandas as pd
 from bokeh.plotting import figure
 from bokeh.models import ColumnDataSource, HoverTool, BoxAnnotation, LinearAxis, Range1d, DatetimeTickFormatter
-from datetime import timedelta
+from plot_sources import create_sensor_source
+from calendar_markers import create_marker_source, add_calendar_markers
 
-def find_sundays_in_range(start_date, end_date):
-    sundays = []
-    current_date = start_date
-    while current_date <= end_date:
-        if current_date.day_name() == 'Sunday':
-            sundays.append(current_date)
-        current_date += timedelta(days=1)
-    return sundays
-
-def create_slope_plot(df, start_date, end_date, show_sunday_marker, x_range):
-    # Filter dataframe based on selected date range
-    filtered_df = df.loc[(df['date'] >= start_date) & (df['date'] < end_date)]
+def create_slope_plot(df, start_date, end_date, show_sunday_marker, x_range, source=None, marker_source=None):
+    # df is already sliced to the selected date range by the caller
+    filtered_df = df
 
     # Create Bokeh plot
     plot = figure(title='Orgel', x_axis_label='Zeitstempel', width=1200, height=600,
@@ -34,19 +26,24 @@ def create_slope_plot(df, start_date, end_date, show_sunday_marker, x_range):
     plot.xaxis.ticker.desired_num_ticks = 10
 
     # Plot temperature
-    temp_slope_line = plot.line('date', 'ah_slope', source=ColumnDataSource(filtered_df), legend_label="ah/h", line_width=2, color='blue')
+    # Source with only the drawn columns, can be shared with linked plots if passed in
+    if source is None:
+        source = create_sensor_source(filtered_df, ['ah_slope'], 2 * plot.width)
+    temp_slope_line = plot.line('date', 'ah_slope', source=source, legend_label="ah/h", line_width=2, color='blue')
     plot.add_tools(HoverTool(renderers=[temp_slope_line], tooltips=[
         ('Date', '@date{%F %H:%M}'),
         ('Temperature', '@ah_slope{0.2f} g/m³h')
     ], formatters={'@date': 'datetime'}, mode='vline'))
 
 
+    # Keep the y axis scaled to the slope line only
+    plot.y_range.renderers = [temp_slope_line]
+
     # Add Sunday markers
     if show_sunday_marker:
-        sundays = find_sundays_in_range(start_date, end_date)
-        for sunday in sundays:
-            plot.add_layout(
-                BoxAnnotation(left=sunday, right=sunday + timedelta(days=1), fill_alpha=0.1, fill_color='green'))
+        if marker_source is None:
+            marker_source = create_marker_source(start_date, end_date)
+        add_calendar_markers(plot, marker_source)
 
     # Style the plot
     plot.legend.location = "top_left"
@@ -1,22 +1,35 @@
+import numpy as np
 import pandas as pd
 from bokeh.plotting import figure
 from bokeh.models import ColumnDataSource, HoverTool, BoxAnnotation, LinearAxis, Range1d, DatetimeTickFormatter, Span
-from datetime import timedelta
-
-def find_sundays_in_range(start_date, end_date):
-    sundays = []
-    current_date = start_date
-    while current_date <= end_date:
-        if current_date.day_name() == 'Sunday':
-            sundays.append(current_date)
-        current_date += timedelta(days=1)
-    return sundays
-
-def create_tslope_plot(df, start_date, end_date, show_sunday_marker, x_range, nutz_df,grund_df):
-    # Filter dataframe based on selected date range
-    filtered_df = df.loc[(df['date'] >= start_date) & (df['date'] < end_date)]
-    filtered_nutz_df = nutz_df.loc[(nutz_df['date'] >= start_date) & (nutz_df['date'] < end_date)]
-    filtered_grund_df = grund_df.loc[(grund_df['date'] >= start_date) & (grund_df['date'] < end_date)]
+from plot_sources import create_sensor_source
+from calendar_markers import create_marker_source, add_calendar_markers
+from run_length import find_date_intervals
+
+def heating_interval_data(nutz_df, grund_df):
+    """
+    Heating intervals as boxes (red: warm-up heating, gray: base heating).
+
+    Parameters:
+    - nutz_df: DataFrame with date and interval_bool
+    - grund_df: DataFrame with date and base_heat
+
+    Returns:
+    - Dictionary with the columns left, right and color
+    """
+    nutz_starts, nutz_ends = find_date_intervals(nutz_df['date'], nutz_df['interval_bool'].to_numpy() == 1)
+    grund_starts, grund_ends = find_date_intervals(grund_df['date'], grund_df['base_heat'].to_numpy() == True)
+    return {
+        'left': np.concatenate([nutz_starts, grund_starts]),
+        'right': np.concatenate([nutz_ends, grund_ends]),
+        'color': ['red'] * len(nutz_starts) + ['gray'] * len(grund_starts),
+    }
+
+def create_tslope_plot(df, start_date, end_date, show_sunday_marker, x_range, nutz_df,grund_df, source=None, marker_source=None):
+    # df, nutz_df and grund_df are already sliced to the selected date range by the caller
+    filtered_df = df
+    filtered_nutz_df = nutz_df
+    filtered_grund_df = grund_df
 
     # Create Bokeh plot
     plot = figure(title='Orgel', x_axis_label='Time', width=1200, height=600,
@@ -59,7 +72,10 @@ def create_tslope_plot(df, start_date, end_date, show_sunday_marker, x_range, nu
     #plot.add_layout(temp_axis, 'right')
 
     # Plot temperature
-    temp_line = plot.line('date', 'temp', source=ColumnDataSource(filtered_df), legend_label="θ", line_width=2, color='blue')
+    # Source with only the drawn columns, can be shared with linked plots if passed in
+    if source is None:
+        source = create_sensor_source(filtered_df, ['temp'], 2 * plot.width)
+    temp_line = plot.line('date', 'temp', source=source, legend_label="θ", line_width=2, color='blue')
     plot.add_tools(HoverTool(renderers=[temp_line], tooltips=[
         ('Date', '@date{%F %H:%M}'),
         ('Temperature', '@temp{0.2f} °C')
@@ -80,59 +96,18 @@ def create_tslope_plot(df, start_date, end_date, show_sunday_marker, x_range, nu
 
     # Add Sunday markers
     if show_sunday_marker:
-        sundays = find_sundays_in_range(start_date, end_date)
-        for sunday in sundays:
-            plot.add_layout(
-                BoxAnnotation(left=sunday, right=sunday + timedelta(days=1), fill_alpha=0.1, fill_color='green'))
-
-    # Find all intervals where heating_bool is 1
-    intervals = []
-    current_interval = None
-
-    for _, row in filtered_nutz_df.iterrows():
-        if row['interval_bool'] == 1:
-            if current_interval is None:
-                current_interval = {'start': row['date'], 'end': row['date']}
-            else:
-                current_interval['end'] = row['date']
-        else:
-            if current_interval is not None:
-                intervals.append(current_interval)
-                current_interval = None
-
-    if current_interval is not None:
-        intervals.append(current_interval)
-
-    # Create a BoxAnnotation for each interval
-    for interval in intervals:
-        box = BoxAnnotation(left=interval['start'], right=interval['end'],
-                            fill_alpha=0.1, fill_color='red')
-        plot.add_layout(box)
-
-
-    # Find all intervals where heating_bool is 1
-    intervals = []
-    current_interval = None
-
-    for _, row in filtered_grund_df.iterrows():
-        if row['base_heat'] == True:
-            if current_interval is None:
-                current_interval = {'start': row['date'], 'end': row['date']}
-            else:
-                current_interval['end'] = row['date']
-        else:
-            if current_interval is not None:
-                intervals.append(current_interval)
-                current_interval = None
-
-    if current_interval is not None:
-        intervals.append(current_interval)
-
-    # Create a BoxAnnotation for each interval
-    for interval in intervals:
-        box = BoxAnnotation(left=interval['start'], right=interval['end'],
-                            fill_alpha=0.1, fill_color='gray')
-        plot.add_layout(box)
+        if marker_source is None:
+            marker_source = create_marker_source(start_date, end_date)
+        add_calendar_markers(plot, marker_source)
+
+    # Heating intervals (red: warm-up heating, gray: base heating) drawn as one quad glyph spanning the full height
+    interval_source = ColumnDataSource(heating_interval_data(filtered_nutz_df, filtered_grund_df))
+    plot.extra_y_ranges["interval_range"] = Range1d(0, 1)
+    plot.quad(left='left', right='right', bottom=0, top=1, source=interval_source, fill_color='color',
+              fill_alpha=0.1, line_color=None, y_range_name="interval_range", level='underlay',
+              name='heating_intervals')
+    # Keep the temperature axis scaled to the temperature line only
+    plot.y_range.renderers = [temp_line]
 
     # Style the plot
     plot.legend.location = "top_left"
@@ -0,0 +1,148 @@
+import os
+from functools import lru_cache
+import pandas as pd
+from sensor_store import STORE_DIR, read_range, date_bounds
+from time_slice import sort_by_date, slice_by_date
+from rollups import ROLLUP_COLUMNS, choose_resolution
+from align_sensors import WIDE_COLUMNS, sensor_from_wide
+from sensor_registry import get_sites, site_table_name
+
+# Number of (table, months, columns) windows kept in memory for the whole process
+CACHE_SIZE = 64
+
+def _signature(name, store_dir):
+    """
+    Modification time of a table in the store (or of its flat parquet file).
+
+    write_partitioned swaps in a freshly written directory, so every ingest changes the signature and
+    the cached windows of the old data are no longer hit.
+    """
+    path = os.path.join(store_dir, name)
+    if not os.path.isdir(path):
+        path = f'{name}.parquet'
+    return os.stat(path).st_mtime_ns
+
+def _table_exists(name, store_dir):
+    return os.path.isdir(os.path.join(store_dir, name)) or os.path.exists(f'{name}.parquet')
+
+def find_site_table(site, table, store_dir=STORE_DIR):
+    """
+    Find a per-site table (see sensor_registry.site_table_name) in the store or as a flat parquet file.
+
+    Older ingests wrote the tables of the first site without the site prefix (e.g. nutzheiz.parquet),
+    these are used for that site if the per-site table does not exist.
+
+    Parameters:
+    - site: Name of the site
+    - table: Name of the table within the site (e.g. 'nutzheiz')
+    - store_dir: Root directory of the store (default: store)
+
+    Returns:
+    - Name of the table to load, or None if the site has no such table
+    """
+    names = [site_table_name(site, table)] + ([table] if site == get_sites()[0] else [])
+    for name in names:
+        if _table_exists(name, store_dir):
+            return name
+    return None
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _load_months(name, signature, first_month, end_month, columns, store_dir):
+    return sort_by_date(read_range(name, first_month, end_month, list(columns) if columns is not None else None,
+                                   store_dir))
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _load_date_bounds(name, signature, store_dir):
+    return date_bounds(name, store_dir)
+
+def load_range(name, start_date, end_date, columns=None, store_dir=STORE_DIR):
+    """
+    Cached version of sensor_store.read_range, shared by all sessions of the process.
+
+    Whole months are read and cached, keyed on the table's modification time, so reruns with the same or a
+    narrower date range within the cached months do not touch the disk. The cached months are sorted by date and
+    the window is returned as a slice of them, so the returned DataFrame must not be modified.
+
+    Parameters:
+    - name: Name of the table (e.g. 'orgel')
+    - start_date: Start of the range (inclusive)
+    - end_date: End of the range (exclusive)
+    - columns: List of columns to read, all if None (default: None)
+    - store_dir: Root directory of the store (default: store)
+
+    Returns:
+    - DataFrame with the selected rows and columns, sorted by date
+    """
+    start_date = pd.Timestamp(start_date)
+    end_date = pd.Timestamp(end_date)
+    first_month = start_date.to_period('M').to_timestamp()
+    end_month = (end_date - pd.Timedelta(1)).to_period('M').to_timestamp() + pd.offsets.MonthBegin(1)
+    df = _load_months(name, _signature(name, store_dir), first_month, end_month,
+                      tuple(columns) if columns is not None else None, store_dir)
+    return slice_by_date(df, start_date, end_date)
+
+def load_date_bounds(name, store_dir=STORE_DIR):
+    """
+    Cached version of sensor_store.date_bounds.
+
+    Parameters:
+    - name: Name of the table (e.g. 'orgel')
+    - store_dir: Root directory of the store (default: store)
+
+    Returns:
+    - Tuple of (first timestamp, last timestamp)
+    """
+    return _load_date_bounds(name, _signature(name, store_dir), store_dir)
+
+def table_signature(name, store_dir=STORE_DIR):
+    """
+    Signature of a table in the store that changes with every ingest, for keying caches built from its data.
+
+    Parameters:
+    - name: Name of the table (e.g. 'orgel')
+    - store_dir: Root directory of the store (default: store)
+
+    Returns:
+    - Modification time of the table in nanoseconds
+    """
+    return _signature(name, store_dir)
+
+def load_window(name, start_date, end_date, columns, min_points=None, max_bucket=None, wide_table=None,
+                store_dir=STORE_DIR):
+    """
+    Load a sensor window at the coarsest resolution that satisfies the request.
+
+    If a rollup (see rollups.py) of the chosen resolution exists in the store, it is loaded instead of the raw rows.
+    Rollups carry the bucket mean under the plain column name plus <column>_min and <column>_max.
+    Raw rows are read from the wide table of the site if given, so all sensors of a site share one cached read
+    and are aligned on common timestamps (see align_sensors.py). This is meant for cross-sensor calculations such
+    as the energy: the wide table only holds the readings matched to the base sensor and is not extended by
+    live appends, so plots read each sensor from its own table.
+
+    Parameters:
+    - name: Name of the sensor table (e.g. 'orgel')
+    - start_date: Start of the range (inclusive)
+    - end_date: End of the range (exclusive)
+    - columns: List of columns to read, including 'date'
+    - min_points: Minimum number of points needed in the range, e.g. the plot width in pixels (default: None)
+    - max_bucket: Longest acceptable bucket length as Timedelta (default: None)
+    - wide_table: Name of the wide table holding this sensor for cross-sensor work, e.g. 'st_laurentius_wide'
+      (default: None)
+    - store_dir: Root directory of the store (default: store)
+
+    Returns:
+    - DataFrame with the selected rows and columns, sorted by date
+    """
+    resolution = choose_resolution(start_date, end_date, min_points, max_bucket)
+    rollup_name = f'{name}_{resolution}'
+    value_columns = [column for column in columns if column != 'date']
+    if (resolution is not None and set(value_columns) <= set(ROLLUP_COLUMNS)
+            and os.path.isdir(os.path.join(store_dir, rollup_name))):
+        rollup_columns = ['date'] + [f'{column}{suffix}' for column in value_columns for suffix in ('', '_min', '_max')]
+        return load_range(rollup_name, start_date, end_date, rollup_columns, store_dir)
+    if (resolution is None and wide_table is not None and set(value_columns) <= set(WIDE_COLUMNS)
+            and os.path.isdir(os.path.join(store_dir, wide_table))):
+        wide_df = load_range(wide_table, start_date, end_date, None, store_dir)
+        if f'temp_{name}' in wide_df:
+            return sensor_from_wide(wide_df, name, value_columns)
+    return load_range(name, start_date, end_date, columns, store_dir)
@@ -0,0 +1,105 @@
+import numpy as np
+
+def minmax_indices(y, n_out):
+    """
+    Select the positions of the minimum and maximum of y in n_out / 2 buckets of (almost) equal size.
+
+    Keeps every peak and trough of the series, so a line drawn through the selected points has the same
+    envelope as the full series at the resolution of the plot.
+
+    Parameters:
+    - y: Array of values (NaN allowed)
+    - n_out: Maximum number of positions to return
+
+    Returns:
+    - Sorted array of positions into y
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    n_buckets = max(n_out // 2, 1)
+    if n <= n_out:
+        return np.arange(n)
+
+    # The first r buckets hold one row more than the others, so all n_buckets buckets hold rows
+    q, r = divmod(n, n_buckets)
+    positions = []
+    for start, bucket_size, count in ((0, q + 1, r), (r * (q + 1), q, n_buckets - r)):
+        if count == 0:
+            continue
+        buckets = y[start:start + count * bucket_size].reshape(count, bucket_size)
+        offsets = start + np.arange(count) * bucket_size
+        positions.append(offsets + np.argmin(np.where(np.isnan(buckets), np.inf, buckets), axis=1))
+        positions.append(offsets + np.argmax(np.where(np.isnan(buckets), -np.inf, buckets), axis=1))
+    return np.unique(np.concatenate(positions))
+
+def lttb_indices(x, y, n_out):
+    """
+    Select n_out positions of a series with the Largest-Triangle-Three-Buckets algorithm.
+
+    Each bucket keeps the point spanning the largest triangle with the point kept in the previous bucket
+    and the mean of the next bucket. The first and last points are always kept.
+
+    Parameters:
+    - x: Array of x values (datetime64 or numeric)
+    - y: Array of values
+    - n_out: Number of positions to return (at least 3)
+
+    Returns:
+    - Sorted array of positions into x and y
+    """
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype('datetime64[ns]').astype(np.int64)
+    x = x.astype(float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+
+    # Buckets for the points between the first and the last one
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    y_filled = np.where(np.isnan(y), np.nanmean(y), y)
+    positions = np.empty(n_out, dtype=np.int64)
+    positions[0] = 0
+    positions[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        mean_x = x[next_start:next_end].mean()
+        mean_y = y_filled[next_start:next_end].mean()
+        area = np.abs((x[a] - mean_x) * (y_filled[start:end] - y_filled[a])
+                      - (x[a] - x[start:end]) * (mean_y - y_filled[a]))
+        a = start + int(np.argmax(area))
+        positions[i + 1] = a
+    return positions
+
+def downsample(df, columns, n_out, method='minmax'):
+    """
+    Reduce a sensor table to about n_out rows per column for plotting.
+
+    The positions selected for each of the given columns are merged, so all columns stay aligned on
+    the same dates. Tables with at most n_out rows are returned unchanged.
+
+    Parameters:
+    - df: DataFrame with a 'date' column, sorted by date
+    - columns: Columns whose shape should be preserved
+    - n_out: Target number of points per column, typically twice the plot width in pixels
+    - method: 'minmax' (min/max per bucket) or 'lttb' (default: 'minmax')
+
+    Returns:
+    - DataFrame with the selected rows of df
+    """
+    if len(df) <= n_out:
+        return df
+
+    positions = []
+    for column in columns:
+        if method == 'lttb':
+            positions.append(lttb_indices(df['date'].to_numpy(), df[column].to_numpy(), n_out))
+        elif method == 'minmax':
+            positions.append(minmax_indices(df[column].to_numpy(), n_out))
+        else:
+            raise ValueError(f"Unknown downsampling method: {method}")
+    return df.iloc[np.unique(np.concatenate(positions))]
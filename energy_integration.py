@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+from time_slice import utc_dates
+
+# Heat loss coefficient 3.1 = 2.2 + 0.9 kWh/K from HL
+HEAT_LOSS_COEFFICIENT = 3.1
+# Intervals between readings longer than this count as gaps in the data
+MAX_GAP = pd.Timedelta(minutes=30)
+# How gaps are integrated: 'skip' adds no energy, 'interpolate' keeps the trapezoid over the gap,
+# 'hold' keeps the value of the last reading before the gap
+GAP_POLICIES = ('skip', 'interpolate', 'hold')
+
+def integrate_intervals(dates, values, max_gap=MAX_GAP, gap_policy='skip'):
+    """
+    Integrate values over the actual timestamps with the trapezoidal rule, one area per interval between readings.
+
+    Repeated or out-of-order timestamps (the local-time loggers repeat an hour at the October DST change) give
+    intervals of zero length. Intervals longer than max_gap or with a missing value at either end are gaps.
+
+    Parameters:
+    - dates: Array of timestamps
+    - values: Array of values, e.g. heating power in kW, or 2-D array with one series of values per row
+    - max_gap: Longest interval that is not a gap as Timedelta (default: 30 minutes)
+    - gap_policy: 'skip', 'interpolate' or 'hold', see GAP_POLICIES (default: 'skip')
+
+    Returns:
+    - Tuple of arrays (hours, area, gap) with one entry per interval (per row and interval for 2-D values),
+      area in value units * hours
+    """
+    if gap_policy not in GAP_POLICIES:
+        raise ValueError(f"Unknown gap policy: {gap_policy}")
+    dates = np.asarray(dates, dtype='datetime64[ns]')
+    values = np.asarray(values, dtype=float)
+
+    hours = np.diff(dates).astype(np.int64) / 3.6e12
+    hours = np.where(hours > 0, hours, 0.0)
+    missing = np.isnan(values[..., :-1]) | np.isnan(values[..., 1:])
+    gap = (hours > max_gap / pd.Timedelta(hours=1)) | missing
+
+    area = (values[..., :-1] + values[..., 1:]) / 2 * hours
+    if gap_policy == 'skip':
+        area[gap] = 0.0
+    elif gap_policy == 'hold':
+        area[gap] = values[..., :-1][gap] * np.broadcast_to(hours, gap.shape)[gap]
+    # Gaps next to a missing value cannot be filled by any policy
+    area[missing & np.isnan(area)] = 0.0
+    return hours, area, gap
+
+def energy_intervals(merged_df, heating_temp=9, coefficient=HEAT_LOSS_COEFFICIENT, max_gap=MAX_GAP,
+                     gap_policy='skip'):
+    """
+    Base heating energy per interval between readings.
+
+    The heating power at a reading is coefficient * (temp_orgel - temp_aussen) where the orgel is at or below
+    heating_temp and warmer than outside, and 0 otherwise. The dates are local logger time in logged order.
+
+    Parameters:
+    - merged_df: DataFrame from merge_energy_input (date, temp_orgel, temp_aussen, temp_diff)
+    - heating_temp: Set point in °C below which base heating is assumed (default: 9)
+    - coefficient: Heat loss coefficient in kWh/K (default: 3.1)
+    - max_gap: Longest interval that is not a gap as Timedelta (default: 30 minutes)
+    - gap_policy: 'skip', 'interpolate' or 'hold', see GAP_POLICIES (default: 'skip')
+
+    Returns:
+    - DataFrame with one row per interval: date (start of the interval), end, hours, heating_hours (time with
+      base heating), energy_kwh and gap, so it can be stored with sensor_store.write_partitioned
+    """
+    dates = merged_df['date'].to_numpy()
+    temp_diff = merged_df['temp_diff'].to_numpy()
+    heating = (merged_df['temp_orgel'].to_numpy() <= heating_temp) & (temp_diff > 0)
+    power = coefficient * np.where(heating, temp_diff, 0.0)
+
+    # Both series in one pass: the heating indicator integrates to the time with base heating.
+    # The interval lengths are taken in UTC, so the DST changes neither add nor drop an hour
+    hours, area, gap = integrate_intervals(utc_dates(merged_df['date']), np.vstack([power, heating]), max_gap,
+                                           gap_policy)
+    return pd.DataFrame({'date': dates[:-1], 'end': dates[1:], 'hours': hours, 'heating_hours': area[1],
+                         'energy_kwh': area[0], 'gap': gap[0]})
+
+def daily_energy(intervals_df):
+    """
+    Sum the interval energies per day (by interval start), with a row for every day in the range.
+
+    Parameters:
+    - intervals_df: DataFrame from energy_intervals
+
+    Returns:
+    - DataFrame with one row per consecutive day: date, energy_kwh, hours and gaps (number of gap intervals),
+      without rows if there are no intervals
+    """
+    days = intervals_df['date'].dt.normalize()
+    daily_df = intervals_df.groupby(days).agg(energy_kwh=('energy_kwh', 'sum'), hours=('hours', 'sum'),
+                                              gaps=('gap', 'sum'))
+    if daily_df.empty:
+        daily_df.index.name = 'date'
+        return daily_df.reset_index()
+    full_range = pd.date_range(daily_df.index.min(), daily_df.index.max(), freq='D')
+    daily_df = daily_df.reindex(full_range, fill_value=0)
+    daily_df.index.name = 'date'
+    return daily_df.reset_index()
+
+def prefix_sums(values):
+    """
+    Prefix sums with a leading 0, so the sum of values[i:j] is prefix[j] - prefix[i].
+    """
+    return np.concatenate([[0.0], np.cumsum(values)])
+
+def energy_between_days(daily_df, prefix, start_date, end_date):
+    """
+    Energy between two days in O(1) from the prefix sums of daily_energy.
+
+    Parameters:
+    - daily_df: DataFrame from daily_energy
+    - prefix: prefix_sums(daily_df['energy_kwh'])
+    - start_date: First day (inclusive)
+    - end_date: Last day (exclusive)
+
+    Returns:
+    - Energy in kWh
+    """
+    if daily_df.empty:
+        return 0.0
+    first_day = daily_df['date'].iloc[0]
+    i = int(np.clip((pd.Timestamp(start_date).normalize() - first_day).days, 0, len(daily_df)))
+    j = int(np.clip((pd.Timestamp(end_date).normalize() - first_day).days, 0, len(daily_df)))
+    return prefix[max(j, i)] - prefix[i]
+
+def energy_between(intervals_df, prefix, start_date, end_date):
+    """
+    Energy of the intervals starting between two timestamps from the prefix sums of energy_intervals.
+
+    Parameters:
+    - intervals_df: DataFrame from energy_intervals, sorted by date
+    - prefix: prefix_sums(intervals_df['energy_kwh'])
+    - start_date: Start of the range (inclusive)
+    - end_date: End of the range (exclusive)
+
+    Returns:
+    - Energy in kWh
+    """
+    starts = intervals_df['date'].to_numpy()
+    i = np.searchsorted(starts, pd.Timestamp(start_date).to_datetime64(), side='left')
+    j = np.searchsorted(starts, pd.Timestamp(end_date).to_datetime64(), side='left')
+    return prefix[max(j, i)] - prefix[i]
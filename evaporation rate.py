@@ -1,15 +1,8 @@
-import math
-
-def saturation_vapor_pressure(temperature):
-    """https://de.wikipedia.org/wiki/S%C3%A4ttigungsdampfdruck"""
-    """https://planetcalc.com/2161/"""
-    return 6.112 * math.exp((17.62 * temperature) / (243.12 + temperature))
+from psychrometrics import vapor_pressure
 
 def actual_vapor_pressure(relative_humidity, temperature):
     """Calculate the actual vapor pressure"""
-    es = saturation_vapor_pressure(temperature)
-    ea = (relative_humidity / 100) * es
-    return ea
+    return vapor_pressure(temperature, relative_humidity)
 # Geometry of the Church
 V = 6864 #m³
 Aw = 50 #m²
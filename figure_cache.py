@@ -0,0 +1,63 @@
+from collections import OrderedDict
+import pandas as pd
+from bokeh.models import DataRange1d
+
+# Number of date ranges whose linked figures are kept per session
+RANGE_CACHE_SIZE = 4
+# Number of figures and sources kept per date range
+MODEL_CACHE_SIZE = 32
+
+def _lru_get(cache, key, build, maxsize):
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+    value = build()
+    cache[key] = value
+    if len(cache) > maxsize:
+        cache.popitem(last=False)
+    return value
+
+def get_range_group(cache, start_date, end_date):
+    """
+    Get the cached models of one date range, created on first use.
+
+    All figures of a date range share one x range, so a figure rebuilt after an input change stays linked to the
+    cached figures. When a date range is evicted, its x range goes together with all figures linked to it.
+
+    Parameters:
+    - cache: OrderedDict holding the groups, e.g. kept in the session state
+    - start_date: Start of the selected range
+    - end_date: End of the selected range
+
+    Returns:
+    - Dictionary with the shared 'x_range' and the 'models' cache of the date range
+    """
+    return _lru_get(cache, (pd.Timestamp(start_date), pd.Timestamp(end_date)),
+                    lambda: {'x_range': DataRange1d(), 'models': OrderedDict()}, RANGE_CACHE_SIZE)
+
+def cached_model(group, key, build):
+    """
+    Get a figure or source of a date range from the cache, building it only if its inputs are new.
+
+    Parameters:
+    - group: Date range group from get_range_group
+    - key: Hashable tuple of all inputs of the model (options, slider bounds, table signatures)
+    - build: Function without arguments that builds the model
+
+    Returns:
+    - The cached or newly built model
+    """
+    return _lru_get(group['models'], key, build, MODEL_CACHE_SIZE)
+
+def release_layout(layout):
+    """
+    Detach a rendered layout from the document it was serialized in.
+
+    Bokeh models can only belong to one document, so cached figures have to be detached before they are put into
+    the layout of the next rerun.
+
+    Parameters:
+    - layout: Bokeh layout passed to st.bokeh_chart
+    """
+    if layout.document is not None:
+        layout.document.remove_root(layout)
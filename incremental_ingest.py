@@ -0,0 +1,123 @@
+import json
+import os
+from itertools import chain
+import pandas as pd
+import pyarrow.parquet as pq
+from stream_file import iter_logger_batches, stream_file_to_parquet
+
+WATERMARK_FILE = 'ingest_watermarks.json'
+
+def load_watermarks(path=WATERMARK_FILE):
+    """
+    Load the per-source watermarks written by the last incremental ingest.
+
+    Parameters:
+    - path: Path to the watermark JSON file (default: ingest_watermarks.json)
+
+    Returns:
+    - Dictionary mapping source file to {'rows': number of ingested rows, 'last_date': last ingested timestamp
+      (None without rows), 'mtime' and 'size': modification time and size of the source file at ingest}
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_watermarks(watermarks, path=WATERMARK_FILE):
+    """
+    Save the per-source watermarks.
+
+    Parameters:
+    - watermarks: Dictionary as returned by load_watermarks
+    - path: Path to the watermark JSON file (default: ingest_watermarks.json)
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(watermarks, f, indent=2)
+
+def _last_row(parquet_file):
+    """
+    Last row of a parquet file, reading only its last row group with rows.
+    """
+    for i in reversed(range(parquet_file.num_row_groups)):
+        table = parquet_file.read_row_group(i)
+        if table.num_rows:
+            return table.slice(table.num_rows - 1).to_pandas().iloc[0]
+    return None
+
+def _concat_parquet(paths, parquet_path):
+    """
+    Write the row groups of several parquet files one after another into one file, one row group at a time.
+    """
+    writer = None
+    try:
+        for path in paths:
+            parquet_file = pq.ParquetFile(path)
+            if writer is None:
+                writer = pq.ParquetWriter(parquet_path, parquet_file.schema_arrow)
+            for i in range(parquet_file.num_row_groups):
+                writer.write_table(parquet_file.read_row_group(i).cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+def process_file_incremental(file_path, parquet_path, watermarks, calculate_temp_60=False, on_batch=None,
+                             **reader_options):
+    """
+    Append only the rows of a logger export that are newer than the watermark to its parquet file.
+
+    The watermark stores the number of rows already ingested and the timestamp of the last one.
+    Row counts are used instead of a timestamp comparison because the loggers record local time,
+    so the October DST change repeats timestamps. If the export no longer matches the watermark
+    (e.g. it was rewritten or truncated) or the parquet file is missing, the source is rebuilt.
+    A source file whose modification time and size are unchanged is not read at all.
+    The new rows are streamed in batches and the stored rows are copied row group by row group,
+    so neither is held in memory as a whole.
+
+    Parameters:
+    - file_path: Path to the Excel or CSV file
+    - parquet_path: Path to the parquet file holding the processed rows
+    - watermarks: Dictionary as returned by load_watermarks, updated in place
+    - calculate_temp_60: Whether to calculate temperature for 60% RH (default: False)
+    - on_batch: Optional function called with every batch of new rows, not when the source is rebuilt
+      (default: None)
+    - reader_options: Further keyword arguments for iter_logger_batches (sep, decimal, date_format, columns)
+
+    Returns:
+    - Number of new rows, or None if the parquet file was rebuilt
+    """
+    watermark = watermarks.get(file_path)
+    stat = os.stat(file_path)
+    if (watermark is not None and os.path.exists(parquet_path)
+            and watermark.get('mtime') == stat.st_mtime and watermark.get('size') == stat.st_size):
+        return 0
+
+    previous_row = None
+    new_batches = None
+    rows = watermark['rows'] if watermark is not None else 0
+    if rows > 0 and os.path.exists(parquet_path) and pq.ParquetFile(parquet_path).metadata.num_rows == rows:
+        # Re-read the last ingested row to check that the export still continues the stored data
+        new_batches = iter_logger_batches(file_path, skip_rows=rows - 1, **reader_options)
+        first_batch = next(new_batches, None)
+        if (first_batch is not None and not first_batch.empty
+                and first_batch['date'].iloc[0] == pd.Timestamp(watermark['last_date'])):
+            previous_row = _last_row(pq.ParquetFile(parquet_path))
+            new_batches = chain([first_batch.iloc[1:]], new_batches)
+
+    temp_path = parquet_path + '.tmp'
+    if previous_row is None:
+        rows, last_row = stream_file_to_parquet(file_path, temp_path, calculate_temp_60, **reader_options)
+        os.replace(temp_path, parquet_path)
+        new_rows = None
+    else:
+        # Slopes of the first new row are computed against the last stored row
+        new_rows, last_row = stream_file_to_parquet(file_path, temp_path, calculate_temp_60, batches=new_batches,
+                                                    previous_row=previous_row, on_batch=on_batch)
+        if new_rows:
+            _concat_parquet([parquet_path, temp_path], parquet_path + '.new')
+            os.replace(parquet_path + '.new', parquet_path)
+        os.remove(temp_path)
+        rows += new_rows
+
+    watermarks[file_path] = {'rows': rows, 'last_date': last_row['date'].isoformat() if rows else None,
+                             'mtime': stat.st_mtime, 'size': stat.st_size}
+    return new_rows
@@ -1,31 +1,75 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import pandas as pd
-from process_file import process_file
-from baseload_energy_calculation import calculate_energy_consumption
+from incremental_ingest import load_watermarks, save_watermarks
+from parallel_ingest import submit_sources
+from sensor_store import STORE_DIR, write_partitioned
+from sensor_registry import SENSORS, ENERGY_SENSORS, get_sites, get_site_sensors, site_table_name
+from align_sensors import align_sensors, wide_table_name
+from baseload_energy_calculation import calculate_energy_consumption, merge_energy_input
+from energy_integration import energy_intervals
 from warmup import warmup
 pd.options.mode.chained_assignment = None
 
 parseFile = True
+# Only process rows added to the Excel exports since the last run
+incremental = True
+# Ingest the source files in parallel worker processes
+parallel = True
+
+# Loggers to ingest, see sensor_registry
+sensors = SENSORS
 
 def main():
     if parseFile:
-        aussen_df = process_file('aussen.xlsx')
-        aussen_df.to_parquet('aussen.parquet', engine='pyarrow')
-
-        orgel_df = process_file('orgel.xlsx', calculate_temp_60=True)
-        orgel_df.to_parquet('orgel.parquet', engine='pyarrow')
-
-        # Calculate and print the energy consumption
-        grundheiz_df = calculate_energy_consumption(aussen_df, orgel_df,heating_temp=9.5)
-        grundheiz_df.to_parquet('grundheiz.parquet', engine='pyarrow')
-        nutzheiz_df = warmup(aussen_df, orgel_df)
-        nutzheiz_df.to_parquet('nutzheiz.parquet', engine='pyarrow')
-
-        bankreihe_df = process_file('bankreihe.xlsx')
-        bankreihe_df.to_parquet('bankreihe.parquet', engine='pyarrow')
-    else:
-        aussen_df = pd.read_parquet('aussen.parquet', engine='pyarrow')
-        orgel_df = pd.read_parquet('orgel.parquet', engine='pyarrow')
-        bankreihe_df = pd.read_parquet('bankreihe.parquet', engine='pyarrow')
-    pass
-
-main()
\ No newline at end of file
+        watermarks = load_watermarks() if incremental else {}
+        previous_watermarks = dict(watermarks)
+        # Each worker writes <name>.parquet, the month-partitioned store and the rollups of its source;
+        # without parallel a single thread runs the sources one after another
+        # Sources beyond the number of CPUs wait for a free worker instead of competing for the cores
+        executor = (ProcessPoolExecutor(max_workers=min(len(sensors), os.cpu_count() or 1)) if parallel
+                    else ThreadPoolExecutor(max_workers=1))
+        with executor:
+            futures = submit_sources(executor, sensors, incremental, watermarks)
+            sources = {sensor['name']: sensor['source'] for sensor in sensors}
+
+            # The energy steps only need the outside and heated sensors, the others keep running meanwhile
+            for site, energy_sensors in ENERGY_SENSORS.items():
+                for name in energy_sensors.values():
+                    watermarks[sources[name]] = futures[name].result()
+                aussen_df = pd.read_parquet(f"{energy_sensors['outside']}.parquet", engine='pyarrow')
+                orgel_df = pd.read_parquet(f"{energy_sensors['inside']}.parquet", engine='pyarrow')
+
+                # Calculate and print the energy consumption
+                print(site)
+                grundheiz_df = calculate_energy_consumption(aussen_df, orgel_df,heating_temp=9.5)
+                grundheiz_df.to_parquet(f"{site_table_name(site, 'grundheiz')}.parquet", engine='pyarrow')
+                nutzheiz_df = warmup(aussen_df, orgel_df)
+                nutzheiz_df.to_parquet(f"{site_table_name(site, 'nutzheiz')}.parquet", engine='pyarrow')
+                write_partitioned(grundheiz_df, site_table_name(site, 'grundheiz'))
+                # Base heating energy per interval, summed for any date range with energy_integration.prefix_sums
+                energy_df = energy_intervals(merge_energy_input(aussen_df, orgel_df), heating_temp=9.5)
+                write_partitioned(energy_df, site_table_name(site, 'grundheiz_energy'))
+                write_partitioned(nutzheiz_df, site_table_name(site, 'nutzheiz'))
+
+            for name, future in futures.items():
+                watermarks[sources[name]] = future.result()
+
+            # Align all sensors of a site once and store them as one wide table for the energy code,
+            # rebuilt only if one of its sources changed since the last run
+            for site in get_sites():
+                site_sources = [sensor['source'] for sensor in get_site_sensors(site) if sensor['name'] in futures]
+                unchanged = all(watermarks.get(source) == previous_watermarks.get(source) for source in site_sources)
+                if incremental and unchanged and os.path.isdir(os.path.join(STORE_DIR, wide_table_name(site))):
+                    continue
+                frames = {sensor['name']: pd.read_parquet(f"{sensor['name']}.parquet", engine='pyarrow')
+                          for sensor in get_site_sensors(site) if sensor['name'] in futures}
+                base = ENERGY_SENSORS.get(site, {}).get('inside')
+                write_partitioned(align_sensors(frames, base=base if base in frames else None), wide_table_name(site))
+
+        if incremental:
+            save_watermarks(watermarks)
+
+# Guarded so worker processes importing this module do not start another ingest
+if __name__ == "__main__":
+    main()
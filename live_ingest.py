@@ -0,0 +1,189 @@
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+from stream_file import iter_logger_batches
+from process_file import calculate_derived_columns
+from sensor_store import STORE_DIR, append_partitioned, count_rows, read_last_row, read_range
+from sensor_registry import SENSORS
+
+# Directory the loggers (or a gateway) drop new readings into, one file per upload named <sensor>_<anything>.csv
+# (or .xlsx) with the same columns as the full exports. Ingested files are moved to DROP_DIR/processed,
+# files that match no sensor or fail to ingest to DROP_DIR/rejected.
+# Appended rows are kept by the next full ingest (see parallel_ingest) as long as they are newer than the export.
+DROP_DIR = 'drop'
+PROCESSED_DIR = os.path.join(DROP_DIR, 'processed')
+REJECTED_DIR = os.path.join(DROP_DIR, 'rejected')
+POLL_SECONDS = 10
+# Files modified more recently than this are assumed to be still written
+SETTLE_SECONDS = 2
+
+def find_sensor(file_name, sensors=SENSORS):
+    """
+    Find the sensor a dropped file belongs to from its name (<sensor>_<anything>.<ext> or <sensor>.<ext>).
+
+    Parameters:
+    - file_name: Name of the dropped file
+    - sensors: List of sensor entries from sensor_registry (default: all)
+
+    Returns:
+    - Sensor entry, or None if no sensor matches
+    """
+    prefix = os.path.splitext(file_name)[0].split('_')[0]
+    for sensor in sensors:
+        if sensor['name'] == prefix:
+            return sensor
+    return None
+
+def _first_new_row(dates, last_date, count):
+    """
+    Position of the first row after the count-th occurrence of last_date in dates.
+
+    The loggers record local time, so the October DST change repeats 02:00 to 02:45. Counting the occurrences
+    keeps the readings of the second pass that follow a stored first pass. Without last_date in dates the first
+    later row is taken.
+    """
+    dates = np.asarray(dates, dtype='datetime64[ns]')
+    last_date = pd.Timestamp(last_date).to_datetime64()
+    positions = np.flatnonzero(dates == last_date)
+    if len(positions) == 0:
+        later = np.flatnonzero(dates > last_date)
+        return later[0] if len(later) else len(dates)
+    return positions[min(count, len(positions)) - 1] + 1
+
+def _stored_count(name, date, store_dir):
+    """
+    Number of stored readings of a sensor at a timestamp, 2 in the repeated DST hour if both passes are stored.
+    """
+    date = pd.Timestamp(date)
+    return len(read_range(name, date, date + pd.Timedelta(1), ['date'], store_dir))
+
+def ingest_drop_file(file_path, sensor, store_dir=STORE_DIR):
+    """
+    Append the new readings of a dropped file to the store of its sensor.
+
+    Only readings after the last stored one are kept, so overlapping uploads are not stored twice. The last stored
+    reading is found by its timestamp and the number of times it is stored, so the repeated DST hour is kept.
+    aH and the slopes are calculated for the new rows only, with the slopes of the first new row
+    continuing from the last stored row.
+
+    Parameters:
+    - file_path: Path to the dropped CSV or Excel file
+    - sensor: Sensor entry from sensor_registry
+    - store_dir: Root directory of the store (default: store)
+
+    Returns:
+    - DataFrame with the appended rows (empty if the file held no new readings)
+    """
+    batches = [batch for batch in iter_logger_batches(file_path, columns=sensor['columns']) if not batch.empty]
+    if not batches:
+        return pd.DataFrame()
+    df = pd.concat(batches, ignore_index=True)
+
+    previous_row = read_last_row(sensor['name'], store_dir)
+    if previous_row is not None:
+        count = _stored_count(sensor['name'], previous_row['date'], store_dir)
+        df = df.iloc[_first_new_row(df['date'], previous_row['date'], count):]
+        if df.empty:
+            return df
+    df = calculate_derived_columns(df, sensor['temp_60'], previous_row)
+    append_partitioned(df, sensor['name'], store_dir)
+    return df
+
+def live_rows(df, name, store_dir=STORE_DIR):
+    """
+    Rows appended to the store of a sensor by the live ingest that are newer than the last row of a full export.
+
+    A full ingest rewrites the store from the export, so it adds these rows to keep them.
+
+    Parameters:
+    - df: DataFrame with all processed rows of the export, in logged order
+    - name: Name of the sensor table (e.g. 'orgel')
+    - store_dir: Root directory of the store (default: store)
+
+    Returns:
+    - DataFrame with the columns of df, empty if there are none
+    """
+    if df.empty or not os.path.isdir(os.path.join(store_dir, name)):
+        return df.iloc[:0]
+    last_date = df['date'].iloc[-1]
+    # Read from an hour earlier, so a second DST pass stored after last_date is included
+    stored_df = read_range(name, last_date - pd.Timedelta(hours=1), pd.Timestamp.max, list(df.columns), store_dir,
+                           dtype=np.float64)
+    count = int((df['date'] == last_date).sum())
+    return stored_df.iloc[_first_new_row(stored_df['date'], last_date, count):]
+
+def unstored_rows(new_df, name, previous_rows, store_dir=STORE_DIR):
+    """
+    New rows of a grown export without the ones the live ingest already appended to the store.
+
+    The store holds the first previous_rows rows of the export followed by the live rows, so the new rows are
+    kept from after the last stored reading on, counted like in ingest_drop_file for the repeated DST hour.
+
+    Parameters:
+    - new_df: DataFrame with rows added to the export since the last ingest, in logged order
+    - name: Name of the sensor table (e.g. 'orgel')
+    - previous_rows: Number of rows of the export preceding new_df
+    - store_dir: Root directory of the store (default: store)
+
+    Returns:
+    - DataFrame with the rows of new_df that are not stored yet
+    """
+    if new_df.empty or count_rows(name, store_dir) <= previous_rows:
+        return new_df
+    last_date = read_last_row(name, store_dir)['date']
+    return new_df.iloc[_first_new_row(new_df['date'], last_date, _stored_count(name, last_date, store_dir)):]
+
+def poll_drop_dir(drop_dir=DROP_DIR, processed_dir=PROCESSED_DIR, rejected_dir=REJECTED_DIR, store_dir=STORE_DIR):
+    """
+    Ingest all settled files in the drop directory, oldest first, and move them to the processed directory.
+
+    Files that match no sensor or fail to ingest are moved to the rejected directory, so they are reported once
+    and do not stop the polling.
+
+    Parameters:
+    - drop_dir: Directory to watch (default: drop)
+    - processed_dir: Directory ingested files are moved to (default: drop/processed)
+    - rejected_dir: Directory rejected files are moved to (default: drop/rejected)
+    - store_dir: Root directory of the store (default: store)
+
+    Returns:
+    - Dictionary mapping sensor name to the number of appended rows
+    """
+    if not os.path.isdir(drop_dir):
+        return {}
+    os.makedirs(processed_dir, exist_ok=True)
+    os.makedirs(rejected_dir, exist_ok=True)
+    now = time.time()
+    entries = [entry for entry in os.scandir(drop_dir)
+               if entry.is_file() and os.path.splitext(entry.name)[1].lower() in ('.csv', '.xlsx')
+               and now - entry.stat().st_mtime >= SETTLE_SECONDS]
+
+    appended = {}
+    for entry in sorted(entries, key=lambda entry: entry.stat().st_mtime):
+        sensor = find_sensor(entry.name)
+        if sensor is None:
+            print(f"No sensor for {entry.name}, moved to {rejected_dir}")
+            shutil.move(entry.path, os.path.join(rejected_dir, entry.name))
+            continue
+        try:
+            df = ingest_drop_file(entry.path, sensor, store_dir)
+        except Exception as error:
+            print(f"Ingest of {entry.name} failed ({error!r}), moved to {rejected_dir}")
+            shutil.move(entry.path, os.path.join(rejected_dir, entry.name))
+            continue
+        appended[sensor['name']] = appended.get(sensor['name'], 0) + len(df)
+        shutil.move(entry.path, os.path.join(processed_dir, entry.name))
+    return appended
+
+def main():
+    # Runs next to the dashboards, which pick up the appended rows through the changed store signature
+    print(f"Watching {DROP_DIR} for new readings")
+    while True:
+        for name, rows in poll_drop_dir().items():
+            print(f"{name}: {rows} new readings")
+        time.sleep(POLL_SECONDS)
+
+if __name__ == "__main__":
+    main()
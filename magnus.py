@@ -1,7 +1,8 @@
-import numpy as np
+from psychrometrics import saturation_pressure
+
 def magnus_formula(temp):
     """
-    Calculate the saturation vapor pressure using the Magnus formula.
+    Calculate the saturation vapor pressure using the Magnus formula, see psychrometrics.saturation_pressure.
 
     Parameters:
     - temp: Temperature in Celsius
@@ -9,4 +10,4 @@ def magnus_formula(temp):
     Returns:
     - Saturation vapor pressure (E_s) in hPa
     """
-    return 6.112 * np.exp((17.62 * temp) / (temp + 243.12))
\ No newline at end of file
+    return saturation_pressure(temp)
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+from psychrometrics import absolute_humidity
+from calculate_temp_rh_60 import calculate_temp_rh_60_array
+from process_file import calculate_derived_columns
+
+def derive_reading(date, temp, rh, previous_row=None, calculate_temp_60=False):
+    """
+    Calculate absolute humidity, slopes and optionally the temperature for 60% RH of a single reading.
+
+    Gives the same values as calculate_derived_columns for the same row, so readings can be processed one at a time.
+
+    Parameters:
+    - date: Timestamp of the reading
+    - temp: Temperature in Celsius
+    - rh: Relative humidity in percentage
+    - previous_row: Preceding processed reading (with date, temp and aH), None for the first one (default: None)
+    - calculate_temp_60: Whether to calculate temperature for 60% RH (default: False)
+
+    Returns:
+    - Dictionary with date, temp, rH, aH, temp_slope, ah_slope and optionally temp_60
+    """
+    date = pd.Timestamp(date)
+    temp = np.float64(temp)
+    rh = np.float64(rh)
+    ah = np.round(absolute_humidity(temp, rh), 2)
+
+    temp_slope = ah_slope = np.nan
+    if previous_row is not None:
+        hours = (date - pd.Timestamp(previous_row['date'])).total_seconds() / 3600
+        # Repeated timestamps give an infinite slope, as in the batch path
+        with np.errstate(divide='ignore', invalid='ignore'):
+            temp_slope = np.round((temp - np.float64(previous_row['temp'])) / np.float64(hours), 2)
+            ah_slope = np.round((ah - np.float64(previous_row['aH'])) / np.float64(hours), 2)
+
+    row = {'date': date, 'temp': temp, 'rH': rh, 'aH': ah, 'temp_slope': temp_slope, 'ah_slope': ah_slope}
+    if calculate_temp_60:
+        row['temp_60'] = np.round(calculate_temp_rh_60_array([rh], [ah], [temp])[0], 2)
+    return row
+
+def derive_readings(readings, calculate_temp_60=False, previous_row=None):
+    """
+    Calculate the derived columns of a stream of readings one at a time.
+
+    Only the last reading is kept between steps, so memory stays constant for unbounded inputs.
+
+    Parameters:
+    - readings: Iterable of (date, temp, rH) tuples
+    - calculate_temp_60: Whether to calculate temperature for 60% RH (default: False)
+    - previous_row: Last already processed reading preceding the stream (default: None)
+
+    Returns:
+    - Generator of dictionaries as returned by derive_reading
+    """
+    for date, temp, rh in readings:
+        previous_row = derive_reading(date, temp, rh, previous_row, calculate_temp_60)
+        yield previous_row
+
+def derive_batches(batches, calculate_temp_60=False, previous_row=None):
+    """
+    Calculate the derived columns of a stream of small batches.
+
+    Each batch is processed with calculate_derived_columns, continuing the slopes from the last row of the
+    previous batch.
+
+    Parameters:
+    - batches: Iterable of DataFrames with columns date, temp and rH
+    - calculate_temp_60: Whether to calculate temperature for 60% RH (default: False)
+    - previous_row: Last already processed row preceding the first batch (default: None)
+
+    Returns:
+    - Generator of DataFrames with calculated columns
+    """
+    for batch in batches:
+        if batch.empty:
+            continue
+        df = calculate_derived_columns(batch, calculate_temp_60, previous_row)
+        previous_row = df.iloc[-1]
+        yield df
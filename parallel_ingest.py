@@ -0,0 +1,83 @@
+import os
+import pandas as pd
+from incremental_ingest import process_file_incremental
+from stream_file import stream_file_to_parquet
+from sensor_store import STORE_DIR, write_partitioned, append_partitioned
+from rollups import write_rollups, update_rollups
+from live_ingest import live_rows, unstored_rows
+
+def ingest_source(name, file_path, calculate_temp_60=False, incremental=True, watermark=None, columns=None):
+    """
+    Ingest one logger export into <name>.parquet, the month-partitioned store and its rollups.
+
+    Runs in a worker process, so it only takes and returns picklable values.
+
+    Parameters:
+    - name: Name of the sensor table (e.g. 'orgel')
+    - file_path: Path to the Excel or CSV export
+    - calculate_temp_60: Whether to calculate temperature for 60% RH (default: False)
+    - incremental: Whether to only process rows added since the last run (default: True)
+    - watermark: Watermark of this source from the last run, see incremental_ingest (default: None)
+    - columns: Positions of the 'date', 'rH' and 'temp' columns in the export (default: stream_file.DEFAULT_COLUMNS)
+
+    Returns:
+    - Updated watermark of the source (None if not incremental)
+    """
+    parquet_path = f'{name}.parquet'
+    store_exists = os.path.isdir(os.path.join(STORE_DIR, name))
+    exported_rows = watermark['rows'] if watermark is not None else 0
+    first_date = None
+
+    def append_batch(df):
+        # The new rows go to the store batch by batch as they are streamed, without the ones the live ingest
+        # already appended; the rollups are rebuilt from the bucket of the first new row on afterwards
+        nonlocal exported_rows, first_date
+        unstored_df = unstored_rows(df, name, exported_rows)
+        if len(unstored_df):
+            append_partitioned(unstored_df, name)
+        exported_rows += len(df)
+        first_date = df['date'].min() if first_date is None else min(first_date, df['date'].min())
+
+    new_rows = None
+    if incremental:
+        watermarks = {file_path: watermark} if watermark is not None else {}
+        new_rows = process_file_incremental(file_path, parquet_path, watermarks, calculate_temp_60,
+                                            on_batch=append_batch if store_exists else None, columns=columns)
+        if watermarks[file_path] == watermark and store_exists:
+            # Source unchanged since the last run, the store and rollups are up to date
+            return watermark
+        watermark = watermarks[file_path]
+    else:
+        stream_file_to_parquet(file_path, parquet_path, calculate_temp_60, columns=columns)
+        watermark = None
+
+    if new_rows is not None and store_exists:
+        # The export grew: only the rollup buckets of the new rows, and of the live rows among them, are rebuilt
+        if first_date is not None:
+            update_rollups(name, first_date)
+        return watermark
+
+    df = pd.read_parquet(parquet_path, engine='pyarrow')
+    # Keep the readings the live ingest appended after the end of the export
+    df = pd.concat([df, live_rows(df, name)], ignore_index=True)
+    write_partitioned(df, name)
+    write_rollups(df, name)
+    return watermark
+
+def submit_sources(executor, sensors, incremental=True, watermarks=None):
+    """
+    Submit one ingest worker per source file.
+
+    Parameters:
+    - executor: concurrent.futures executor (e.g. ProcessPoolExecutor)
+    - sensors: List of sensor entries from sensor_registry
+    - incremental: Whether to only process rows added since the last run (default: True)
+    - watermarks: Dictionary of watermarks from the last run, see incremental_ingest (default: None)
+
+    Returns:
+    - Dictionary mapping sensor name to the future of ingest_source
+    """
+    watermarks = watermarks or {}
+    return {sensor['name']: executor.submit(ingest_source, sensor['name'], sensor['source'], sensor['temp_60'],
+                                            incremental, watermarks.get(sensor['source']), sensor['columns'])
+            for sensor in sensors}
@@ -0,0 +1,35 @@
+from bokeh.models import ColumnDataSource
+from downsample import downsample
+
+def sensor_source_data(df, columns, n_out, method='minmax'):
+    """
+    Downsampled columns of a sensor window, as held by the ColumnDataSource of create_sensor_source.
+
+    Parameters:
+    - df: DataFrame with a 'date' column, sorted by date
+    - columns: Columns drawn from this source (e.g. ['temp', 'rH', 'aH'])
+    - n_out: Target number of points per column, typically twice the widest plot width in pixels
+    - method: Downsampling method, see downsample.downsample (default: 'minmax')
+
+    Returns:
+    - Dictionary mapping date and columns to numpy arrays
+    """
+    sampled_df = downsample(df, columns, n_out, method)
+    return {column: sampled_df[column].to_numpy() for column in ['date'] + list(columns)}
+
+def create_sensor_source(df, columns, n_out, method='minmax'):
+    """
+    Create one ColumnDataSource for all lines of a sensor, holding only the date and the drawn columns.
+
+    The source can be shared by several renderers and by linked plots, so every value is serialized once.
+
+    Parameters:
+    - df: DataFrame with a 'date' column, sorted by date
+    - columns: Columns drawn from this source (e.g. ['temp', 'rH', 'aH'])
+    - n_out: Target number of points per column, typically twice the widest plot width in pixels
+    - method: Downsampling method, see downsample.downsample (default: 'minmax')
+
+    Returns:
+    - ColumnDataSource with the columns date and columns
+    """
+    return ColumnDataSource(sensor_source_data(df, columns, n_out, method))
@@ -1,28 +1,67 @@
 import pandas as pd
-from absolute_humidity import calculate_absolute_humidity
-from calculate_temp_rh_60 import calculate_temp_rh_60
+from psychrometrics import absolute_humidity
+from calculate_temp_rh_60 import calculate_temp_rh_60_array
 
-def process_file(file_path, calculate_temp_60=False):
+def read_logger_file(file_path):
     """
-    Load data from an Excel file, calculate absolute humidity, and optionally calculate temperature for 60% RH.
+    Load the raw logger columns (date, temperature, relative humidity) from an Excel file.
 
     Parameters:
     - file_path: Path to the Excel file
-    - calculate_temp_60: Whether to calculate temperature for 60% RH (default: False)
 
     Returns:
-    - DataFrame with calculated columns
+    - DataFrame with columns date, temp and rH
     """
     df_temp = pd.read_excel(file_path, engine='openpyxl')
     df = pd.DataFrame()
     df["date"] = pd.to_datetime(df_temp.iloc[:, 0])
     df["temp"] = df_temp.iloc[:, 5]
     df["rH"] = df_temp.iloc[:, 3]
-    df["aH"] = calculate_absolute_humidity(df["temp"], df["rH"]).round(2)
-    df['temp_slope'] = (df['temp'].diff() / (df['date'].diff().dt.total_seconds() / 3600)).round(2)
-    df['ah_slope'] = (df['aH'].diff() / (df['date'].diff().dt.total_seconds() / 3600)).round(2)
+    return df
+
+def calculate_derived_columns(df, calculate_temp_60=False, previous_row=None):
+    """
+    Calculate absolute humidity, slopes and optionally the temperature for 60% RH.
+
+    Parameters:
+    - df: DataFrame with columns date, temp and rH
+    - calculate_temp_60: Whether to calculate temperature for 60% RH (default: False)
+    - previous_row: Last already processed row (with date, temp and aH) preceding df, used so that
+      the slopes of the first row continue across the boundary (default: None)
+
+    Returns:
+    - DataFrame with calculated columns
+    """
+    df = df.reset_index(drop=True)
+    df["aH"] = absolute_humidity(df["temp"], df["rH"]).round(2)
+
+    if previous_row is not None:
+        boundary_df = pd.concat([pd.DataFrame([previous_row])[["date", "temp", "aH"]], df[["date", "temp", "aH"]]],
+                                ignore_index=True)
+    else:
+        boundary_df = df[["date", "temp", "aH"]]
+    hours = boundary_df['date'].diff().dt.total_seconds() / 3600
+    temp_slope = (boundary_df['temp'].diff() / hours).round(2)
+    ah_slope = (boundary_df['aH'].diff() / hours).round(2)
+    offset = len(boundary_df) - len(df)
+    df['temp_slope'] = temp_slope.iloc[offset:].to_numpy()
+    df['ah_slope'] = ah_slope.iloc[offset:].to_numpy()
 
     if calculate_temp_60:
-        df["temp_60"] = df.apply(lambda row: calculate_temp_rh_60(row["rH"], row["aH"], row["temp"]), axis=1).round(2)
-   
+        df["temp_60"] = calculate_temp_rh_60_array(df["rH"], df["aH"], df["temp"]).round(2)
+
     return df
+
+def process_file(file_path, calculate_temp_60=False):
+    """
+    Load data from an Excel file, calculate absolute humidity, and optionally calculate temperature for 60% RH.
+
+    Parameters:
+    - file_path: Path to the Excel file
+    - calculate_temp_60: Whether to calculate temperature for 60% RH (default: False)
+
+    Returns:
+    - DataFrame with calculated columns
+    """
+    df = read_logger_file(file_path)
+    return calculate_derived_columns(df, calculate_temp_60)
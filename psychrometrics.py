@@ -0,0 +1,176 @@
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from scipy.optimize import brentq, newton
+
+# Magnus formula over water, E_s = A * exp(B * T / (C + T)) in hPa (https://de.wikipedia.org/wiki/S%C3%A4ttigungsdampfdruck)
+MAGNUS_A = 6.112
+MAGNUS_B = 17.62
+MAGNUS_C = 243.12
+# Molecular weight of water vapor in kg/kmol and universal gas constant in J/(kmol·K)
+Mw = 18.016
+R = 8314.3
+
+def _values(x, dtype):
+    """
+    Scalars, arrays and Series as they are, lists as float arrays, all cast to dtype if given.
+    """
+    if dtype is not None:
+        return x.astype(dtype) if isinstance(x, pd.Series) else np.asarray(x, dtype=dtype)
+    if isinstance(x, (pd.Series, np.ndarray)) or np.isscalar(x):
+        return x
+    return np.asarray(x, dtype=float)
+
+def saturation_pressure(temp, dtype=None):
+    """
+    Calculate the saturation vapor pressure using the Magnus formula.
+
+    Parameters:
+    - temp: Temperature(s) in Celsius
+    - dtype: Floating point type of the evaluation, e.g. np.float32, the type of the input if None (default: None)
+
+    Returns:
+    - Saturation vapor pressure (E_s) in hPa
+    """
+    temp = _values(temp, dtype)
+    return MAGNUS_A * np.exp((MAGNUS_B * temp) / (temp + MAGNUS_C))
+
+def vapor_pressure(temp, rel_humidity, dtype=None):
+    """
+    Calculate the actual vapor pressure.
+
+    Parameters:
+    - temp: Temperature(s) in Celsius
+    - rel_humidity: Relative humidity(s) in percentage
+    - dtype: Floating point type of the evaluation, the type of the input if None (default: None)
+
+    Returns:
+    - Vapor pressure (E_a) in hPa
+    """
+    return (_values(rel_humidity, dtype) / 100.0) * saturation_pressure(temp, dtype)
+
+def absolute_humidity(temp, rel_humidity, dtype=None):
+    """
+    Calculate the absolute humidity given temperature and relative humidity, broadcasting array arguments.
+
+    Parameters:
+    - temp: Temperature(s) in Celsius
+    - rel_humidity: Relative humidity(s) in percentage
+    - dtype: Floating point type of the evaluation, the type of the input if None (default: None)
+
+    Returns:
+    - Absolute humidity in g/m³
+    """
+    temp = _values(temp, dtype)
+    return 10 ** 5 * Mw / R * vapor_pressure(temp, rel_humidity, dtype) / (temp + 273.15)
+
+def relative_humidity(temp, abs_humidity, dtype=None):
+    """
+    Calculate the relative humidity given temperature and absolute humidity, broadcasting array arguments.
+
+    Parameters:
+    - temp: Temperature(s) in Celsius
+    - abs_humidity: Absolute humidity(s) in g/m³
+    - dtype: Floating point type of the evaluation, the type of the input if None (default: None)
+
+    Returns:
+    - Relative humidity in percentage
+    """
+    temp = _values(temp, dtype)
+    e_a = _values(abs_humidity, dtype) * (273.15 + temp) * R / Mw / 1e5
+    return e_a / saturation_pressure(temp, dtype) * 100
+
+def dew_point(temp, rel_humidity, dtype=None):
+    """
+    Calculate the dew point by inverting the Magnus formula.
+
+    Parameters:
+    - temp: Temperature(s) in Celsius
+    - rel_humidity: Relative humidity(s) in percentage
+    - dtype: Floating point type of the evaluation, the type of the input if None (default: None)
+
+    Returns:
+    - Dew point in Celsius
+    """
+    temp = _values(temp, dtype)
+    gamma = np.log(_values(rel_humidity, dtype) / 100.0) + MAGNUS_B * temp / (MAGNUS_C + temp)
+    return MAGNUS_C * gamma / (MAGNUS_B - gamma)
+
+def temperature_for_rh(abs_humidity, target_rh, initial_temp, tolerance=0.0001, max_iterations=100, dtype=None):
+    """
+    Temperatures at which air with the given absolute humidities has the target relative humidity,
+    solved for all values in one array Newton run.
+
+    Parameters:
+    - abs_humidity: Array of absolute humidity in g/m³
+    - target_rh: Target relative humidity in percentage
+    - initial_temp: Array of temperatures in Celsius, used as initial guess
+    - tolerance: Tolerance for Newton's method (default: 0.0001)
+    - max_iterations: Maximum number of iterations for Newton's method (default: 100)
+    - dtype: Floating point type of the evaluation, float64 if None (default: None)
+
+    Returns:
+    - Array of temperatures in Celsius
+    """
+    c = np.asarray(abs_humidity, dtype=dtype or float) * R / Mw / (10 ** 5)
+    target = target_rh / 100
+
+    def f(temp):
+        return c * (temp + 273.15) / saturation_pressure(temp) - target
+
+    def f_prime(temp):
+        # d/dT of c * (T + 273.15) / E_s(T) with dE_s/dT = E_s * B * C / (T + C)²
+        return c / saturation_pressure(temp) * (1 - (temp + 273.15) * MAGNUS_B * MAGNUS_C / (temp + MAGNUS_C) ** 2)
+
+    return newton(f, np.asarray(initial_temp, dtype=dtype or float), fprime=f_prime, tol=tolerance,
+                  maxiter=max_iterations)
+
+def crossing_temperature(abs_humidity, target_rh, temp_min=-15, temp_max=45):
+    """
+    Temperature at which air with the given absolute humidity has the target relative humidity.
+
+    Unlike temperature_for_rh no initial guess is needed: the relative humidity falls with the temperature at
+    constant absolute humidity, so the crossing is unique and found with Brent's method.
+
+    Parameters:
+    - abs_humidity: Absolute humidity in g/m³
+    - target_rh: Target relative humidity in percentage
+    - temp_min: Lowest temperature searched in Celsius (default: -15)
+    - temp_max: Highest temperature searched in Celsius (default: 45)
+
+    Returns:
+    - Temperature in Celsius, or None if the target is not reached between temp_min and temp_max
+    """
+    def f(temp):
+        return float(relative_humidity(temp, abs_humidity)) - target_rh
+
+    if np.sign(f(temp_min)) == np.sign(f(temp_max)):
+        return None
+    return brentq(f, temp_min, temp_max, xtol=1e-9)
+
+@lru_cache(maxsize=8)
+def rh_grid(temp_min, temp_max, temp_step, ah_min, ah_max, ah_points, dtype=None):
+    """
+    Relative humidity on a (temperature x absolute humidity) grid, evaluated in one broadcast.
+
+    Grids are cached by resolution, so re-rendering a chart with the same grid does not recompute it.
+    The returned arrays are read-only.
+
+    Parameters:
+    - temp_min: Lowest temperature in Celsius
+    - temp_max: Temperature in Celsius the range ends before
+    - temp_step: Temperature step in K
+    - ah_min: Lowest absolute humidity in g/m³
+    - ah_max: Highest absolute humidity in g/m³
+    - ah_points: Number of absolute humidity values
+    - dtype: Floating point type of the grid, float64 if None (default: None)
+
+    Returns:
+    - Tuple of (temperatures, absolute humidities, relative humidity grid of shape (temperatures, absolute humidities))
+    """
+    temps = np.arange(temp_min, temp_max, temp_step, dtype=dtype or float)
+    ahs = np.linspace(ah_min, ah_max, ah_points, dtype=dtype or float)
+    grid = relative_humidity(temps[:, np.newaxis], ahs[np.newaxis, :])
+    for array in (temps, ahs, grid):
+        array.flags.writeable = False
+    return temps, ahs, grid
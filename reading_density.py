@@ -0,0 +1,83 @@
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm
+from sensor_store import STORE_DIR
+from data_access import load_range, load_date_bounds, table_signature
+
+# Number of binned (sensors, date range, grid) results kept in memory
+DENSITY_CACHE_SIZE = 16
+
+@lru_cache(maxsize=DENSITY_CACHE_SIZE)
+def _density(names, signatures, start_date, end_date, temp_range, ah_range, bins, band, store_dir):
+    """
+    Bin the readings of the sensors, cached on the sensors, their table signatures, the date range and the grid.
+    """
+    counts = np.zeros((bins[0], bins[1]))
+    outside = {}
+    for name in names:
+        df = load_range(name, start_date, end_date, ['date', 'temp', 'rH', 'aH'], store_dir).dropna()
+        # histogram2d bins (x, y), the image needs rows of temperature and columns of absolute humidity
+        counts += np.histogram2d(df['temp'].to_numpy(), df['aH'].to_numpy(), bins=bins,
+                                 range=[temp_range, ah_range])[0]
+        rh = df['rH'].to_numpy()
+        outside[name] = (int(((rh < band[0]) | (rh > band[1])).sum()), len(rh))
+
+    readings = sum(n for _, n in outside.values())
+    counts.flags.writeable = False
+    return {
+        'counts': counts,
+        'extent': (ah_range[0], ah_range[1], temp_range[0], temp_range[1]),
+        'readings': readings,
+        'outside_share': {name: n_out / n if n else np.nan for name, (n_out, n) in outside.items()},
+        'total_outside_share': sum(n_out for n_out, _ in outside.values()) / readings if readings else np.nan,
+    }
+
+def reading_density(names, start_date=None, end_date=None, temp_range=(-15, 45), ah_range=(0, 20), bins=(120, 80),
+                    band=(45, 65), store_dir=STORE_DIR):
+    """
+    Density of the measured (temperature, absolute humidity) readings of sensors on a regular grid.
+
+    The readings are binned in bulk with np.histogram2d, so drawing the density does not depend on the number of
+    readings. Results are cached per date range and are recomputed after an ingest changes one of the tables.
+
+    Parameters:
+    - names: Names of the sensors (e.g. ['orgel', 'bankreihe'])
+    - start_date: Start of the range (inclusive), first reading of the first sensor if None (default: None)
+    - end_date: End of the range (exclusive), after the last reading of the first sensor if None (default: None)
+    - temp_range: (min, max) temperature of the grid in Celsius (default: (-15, 45))
+    - ah_range: (min, max) absolute humidity of the grid in g/m³ (default: (0, 20))
+    - bins: Number of (temperature, absolute humidity) cells (default: (120, 80))
+    - band: (lower, upper) relative humidity band in percentage (default: (45, 65))
+    - store_dir: Root directory of the store (default: store)
+
+    Returns:
+    - Dictionary with 'counts' (read-only array of shape bins), 'extent' for imshow, 'readings' (number of readings),
+      'outside_share' (share of readings outside the band per sensor) and 'total_outside_share'
+    """
+    names = tuple(names)
+    if start_date is None or end_date is None:
+        first_date, last_date = load_date_bounds(names[0], store_dir)
+        start_date = first_date if start_date is None else start_date
+        end_date = last_date + pd.Timedelta(1) if end_date is None else end_date
+    signatures = tuple(table_signature(name, store_dir) for name in names)
+    return _density(names, signatures, pd.Timestamp(start_date), pd.Timestamp(end_date), tuple(temp_range),
+                    tuple(ah_range), tuple(bins), tuple(band), store_dir)
+
+def draw_density(density, ax=None, cmap='Blues'):
+    """
+    Draw a density from reading_density as an image with a logarithmic color scale, empty cells transparent.
+
+    Parameters:
+    - density: Dictionary from reading_density
+    - ax: Matplotlib axes, the current axes if None (default: None)
+    - cmap: Name of the colormap (default: 'Blues')
+
+    Returns:
+    - The AxesImage
+    """
+    ax = ax or plt.gca()
+    counts = np.ma.masked_equal(density['counts'], 0)
+    return ax.imshow(counts, extent=density['extent'], origin='lower', aspect='auto', cmap=cmap,
+                     norm=LogNorm(vmin=1, vmax=max(density['counts'].max(), 1)), interpolation='nearest', zorder=0)
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+from sensor_store import STORE_DIR, write_partitioned, replace_from, read_range
+
+# Rollup resolutions from fine to coarse: name, resample rule, bucket length
+ROLLUP_RESOLUTIONS = [
+    ('hour', 'h', pd.Timedelta(hours=1)),
+    ('day', 'D', pd.Timedelta(days=1)),
+    ('week', 'W-MON', pd.Timedelta(weeks=1)),
+]
+ROLLUP_COLUMNS = ['temp', 'rH', 'aH']
+
+def build_rollups(df, columns=ROLLUP_COLUMNS):
+    """
+    Aggregate a sensor table to hourly, daily and weekly buckets.
+
+    Each bucket is labelled with its start (weeks start on Monday) and holds the mean, min, max and count of
+    every column. The mean is stored under the plain column name, so a rollup can be used in place of the raw table.
+
+    Parameters:
+    - df: DataFrame with a 'date' column and the given columns
+    - columns: Columns to aggregate (default: temp, rH, aH)
+
+    Returns:
+    - Dictionary mapping resolution name to the rollup DataFrame
+    """
+    return {name: _rollup(df, rule, columns) for name, rule, _ in ROLLUP_RESOLUTIONS}
+
+def _rollup(df, rule, columns):
+    """
+    Aggregate a sensor table to the buckets of one resample rule, see build_rollups.
+    """
+    grouped = df.resample(rule, on='date', closed='left', label='left')[columns]
+    rollup_df = grouped.agg(['mean', 'min', 'max', 'count'])
+    rollup_df.columns = [column if stat == 'mean' else f'{column}_{stat}' for column, stat in rollup_df.columns]
+    rollup_df[columns] = rollup_df[columns].round(2)
+    return rollup_df.reset_index()
+
+def write_rollups(df, name, columns=ROLLUP_COLUMNS):
+    """
+    Build the rollups of a sensor table and write them to the store as <name>_<resolution> (e.g. orgel_hour).
+
+    Parameters:
+    - df: DataFrame with a 'date' column and the given columns
+    - name: Name of the sensor table (e.g. 'orgel')
+    - columns: Columns to aggregate (default: temp, rH, aH)
+    """
+    for resolution, rollup_df in build_rollups(df, columns).items():
+        write_partitioned(rollup_df, f'{name}_{resolution}')
+
+def update_rollups(name, start_date, columns=ROLLUP_COLUMNS, store_dir=STORE_DIR):
+    """
+    Rebuild the rollup buckets of a sensor table from the bucket holding start_date on, after rows were appended.
+
+    Only the raw rows of the last bucket length before start_date and later are read, the earlier buckets
+    of the rollups are left as they are.
+
+    Parameters:
+    - name: Name of the sensor table (e.g. 'orgel')
+    - start_date: Date of the first appended row (the earliest one, the repeated DST hour may precede it)
+    - columns: Columns to aggregate (default: temp, rH, aH)
+    - store_dir: Root directory of the store (default: store)
+    """
+    start_date = pd.Timestamp(start_date)
+    for resolution, rule, bucket in ROLLUP_RESOLUTIONS:
+        # The bucket holding start_date begins after read_start, so it and all later buckets are complete
+        read_start = start_date - bucket
+        df = read_range(name, read_start, pd.Timestamp.max, ['date'] + columns, store_dir, dtype=np.float64)
+        rollup_df = _rollup(df, rule, columns)
+        rollup_df = rollup_df[rollup_df['date'] > read_start]
+        replace_from(rollup_df, f'{name}_{resolution}', rollup_df['date'].iloc[0], store_dir)
+
+def choose_resolution(start_date, end_date, min_points=None, max_bucket=None):
+    """
+    Choose the coarsest rollup resolution that still satisfies a request.
+
+    Parameters:
+    - start_date: Start of the requested range
+    - end_date: End of the requested range
+    - min_points: Minimum number of buckets needed in the range, e.g. the plot width in pixels (default: None)
+    - max_bucket: Longest acceptable bucket length as Timedelta, a zero length selects the raw data (default: None)
+
+    Returns:
+    - Resolution name ('hour', 'day' or 'week'), or None if only the raw data satisfies the request
+    """
+    span = pd.Timestamp(end_date) - pd.Timestamp(start_date)
+    for name, _, bucket in reversed(ROLLUP_RESOLUTIONS):
+        if min_points is not None and span / bucket < min_points:
+            continue
+        if max_bucket is not None and bucket > max_bucket:
+            continue
+        return name
+    return None
+
+def column_min(df, column):
+    """
+    Minimum of a column in a raw table or rollup (where the bucket minima are used).
+    """
+    return df[f'{column}_min'].min() if f'{column}_min' in df else df[column].min()
+
+def column_max(df, column):
+    """
+    Maximum of a column in a raw table or rollup (where the bucket maxima are used).
+    """
+    return df[f'{column}_max'].max() if f'{column}_max' in df else df[column].max()
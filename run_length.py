@@ -0,0 +1,30 @@
+import numpy as np
+
+def find_runs(mask):
+    """
+    Find the runs of consecutive True values in a boolean array.
+
+    Parameters:
+    - mask: Boolean array or Series
+
+    Returns:
+    - Tuple of (start positions, end positions) of the runs, both inclusive
+    """
+    mask = np.asarray(mask, dtype=bool)
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], mask, [False])).astype(np.int8)))
+    return edges[0::2], edges[1::2] - 1
+
+def find_date_intervals(dates, mask):
+    """
+    Find the date intervals in which mask is True.
+
+    Parameters:
+    - dates: Array or Series of timestamps, aligned with mask
+    - mask: Boolean array or Series
+
+    Returns:
+    - Tuple of (interval starts, interval ends) as datetime64 arrays, the end being the date of the last True row
+    """
+    dates = np.asarray(dates)
+    starts, ends = find_runs(mask)
+    return dates[starts], dates[ends]
@@ -0,0 +1,99 @@
+import re
+
+# Registry of the monitored sites and their loggers. Ingest, storage and plotting iterate over these entries,
+# so adding a logger only needs a new entry here.
+#
+# Each sensor has:
+# - name: Name of the sensor table in the store (unique over all sites)
+# - site: Church the logger is placed in
+# - title: Title of the plot
+# - source: Logger export (Excel or CSV)
+# - columns: Positions of the date, relative humidity and temperature columns in the export
+# - temp_60: Whether to calculate the temperature for 60% RH
+# - plot: Plot options
+#   - tick_format: 'calendar' (day/month/year depending on zoom) or 'timestamp' (full timestamp on every tick)
+#   - reference_temps: Temperatures drawn as dashed lines
+#   - humidity_box: Whether the plot offers a humidity boundary box
+#   - heating_plot: Whether the heating intervals are plotted against this sensor's temperature
+
+SENSORS = [
+    {
+        'name': 'aussen',
+        'site': 'St. Laurentius',
+        'title': 'Aussen',
+        'source': 'aussen.xlsx',
+        'columns': {'date': 0, 'rH': 3, 'temp': 5},
+        'temp_60': False,
+        'plot': {'tick_format': 'calendar', 'reference_temps': [], 'humidity_box': False, 'heating_plot': False},
+    },
+    {
+        'name': 'orgel',
+        'site': 'St. Laurentius',
+        'title': 'Orgel',
+        'source': 'orgel.xlsx',
+        'columns': {'date': 0, 'rH': 3, 'temp': 5},
+        'temp_60': True,
+        'plot': {'tick_format': 'timestamp', 'reference_temps': [14, 10], 'humidity_box': True, 'heating_plot': True},
+    },
+    {
+        'name': 'bankreihe',
+        'site': 'St. Laurentius',
+        'title': 'Bankreihe',
+        'source': 'bankreihe.xlsx',
+        'columns': {'date': 0, 'rH': 3, 'temp': 5},
+        'temp_60': False,
+        'plot': {'tick_format': 'timestamp', 'reference_temps': [14, 10], 'humidity_box': True, 'heating_plot': False},
+    },
+]
+
+# Outside and heated inside sensor used for the energy calculation of each site, its results are stored per site
+# (see site_table_name)
+ENERGY_SENSORS = {
+    'St. Laurentius': {'outside': 'aussen', 'inside': 'orgel'},
+}
+
+def get_sensor(name):
+    """
+    Get the registry entry of a sensor.
+
+    Parameters:
+    - name: Name of the sensor table (e.g. 'orgel')
+
+    Returns:
+    - Dictionary with the sensor configuration
+    """
+    for sensor in SENSORS:
+        if sensor['name'] == name:
+            return sensor
+    raise KeyError(f"Unknown sensor: {name}")
+
+def get_sites():
+    """
+    Get the names of all sites in registry order.
+    """
+    return list(dict.fromkeys(sensor['site'] for sensor in SENSORS))
+
+def get_site_sensors(site):
+    """
+    Get the registry entries of all sensors of a site.
+
+    Parameters:
+    - site: Name of the site
+
+    Returns:
+    - List of sensor dictionaries
+    """
+    return [sensor for sensor in SENSORS if sensor['site'] == site]
+
+def site_table_name(site, table):
+    """
+    Name of a per-site table in the store.
+
+    Parameters:
+    - site: Name of the site
+    - table: Name of the table within the site (e.g. 'grundheiz')
+
+    Returns:
+    - Table name, e.g. 'st_laurentius_grundheiz'
+    """
+    return re.sub(r'\W+', '_', site).strip('_').lower() + '_' + table
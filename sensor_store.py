@@ -0,0 +1,312 @@
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+STORE_DIR = 'store'
+MONTH_PARTITIONING = ds.partitioning(pa.schema([('month', pa.string())]), flavor='hive')
+# Storage schema of the store: 'compact' writes float columns with at most three decimals (the sensor values) as
+# scaled integers, delta encodes them and the dates and compresses with zstd, read_range returns them as float32;
+# 'default' keeps the pandas dtypes and pyarrow's parquet defaults
+STORAGE_SCHEMA = 'compact'
+# Scales of the integer columns of the compact schema, the smallest one that keeps all values of a column is used
+VALUE_SCALES = (100, 1000)
+
+def _scale(field):
+    """
+    Scale of a compact integer column from its field metadata, None for other columns.
+    """
+    if field.metadata and b'scale' in field.metadata:
+        return int(field.metadata[b'scale'])
+    return None
+
+def _value_scale(values):
+    """
+    Smallest of VALUE_SCALES that turns all float values into int32 without loss, None if there is none.
+    """
+    finite = values[~np.isnan(values)]
+    for scale in VALUE_SCALES:
+        scaled = np.round(finite * scale)
+        if np.abs(scaled).max(initial=0) < 2 ** 31 and np.array_equal(scaled / scale, finite):
+            return scale
+    return None
+
+def _to_table(df, storage_schema, existing_schema=None):
+    """
+    Convert a DataFrame to an Arrow table with the month partition column in the given storage schema.
+
+    Appended rows follow the schema of the existing table instead, so all files of a table have the same types.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if storage_schema == 'compact':
+        # The pandas metadata is repeated in every file and outweighs the data of the small rollup partitions
+        table = table.replace_schema_metadata(None)
+    for i, field in enumerate(table.schema):
+        if not pa.types.is_floating(field.type):
+            continue
+        values = table.column(i).to_numpy()
+        if existing_schema is not None:
+            scale = _scale(existing_schema.field(field.name)) if field.name in existing_schema.names else None
+        else:
+            scale = _value_scale(values) if storage_schema == 'compact' else None
+        if scale:
+            scaled = pa.array(np.round(values * scale), mask=np.isnan(values)).cast(pa.int32())
+            table = table.set_column(i, pa.field(field.name, pa.int32(), metadata={'scale': str(scale)}), scaled)
+    if existing_schema is not None:
+        table = table.cast(pa.schema([existing_schema.field(name) for name in table.column_names]))
+    return table.append_column('month', pa.array(df['date'].dt.strftime('%Y-%m'), type=pa.string()))
+
+def _write_options(table, storage_schema):
+    """
+    Parquet write options of the storage schema, None for pyarrow's defaults.
+    """
+    if storage_schema != 'compact':
+        return None
+    columns = [field for field in table.schema if field.name != 'month']
+    delta = [field.name for field in columns if pa.types.is_integer(field.type) or pa.types.is_timestamp(field.type)]
+    return ds.ParquetFileFormat().make_write_options(
+        compression='zstd', use_dictionary=[field.name for field in columns if field.name not in delta],
+        column_encoding={name: 'DELTA_BINARY_PACKED' for name in delta})
+
+def _decode(table, dtype=np.float32):
+    """
+    Convert the scaled integer columns of a compact table back to floats.
+    """
+    for i, field in enumerate(table.schema):
+        scale = _scale(field)
+        if scale:
+            float_type = pa.from_numpy_dtype(dtype)
+            table = table.set_column(i, pa.field(field.name, float_type),
+                                     pc.divide(table.column(i).cast(float_type), pa.scalar(scale, float_type)))
+    return table
+
+def write_partitioned(df, name, store_dir=STORE_DIR, storage_schema=None):
+    """
+    Write a sensor table as a parquet dataset partitioned by month (store/<name>/month=YYYY-MM/).
+
+    The dataset is written next to the old one and swapped in afterwards, so readers never see a half-written store.
+
+    Parameters:
+    - df: DataFrame with a 'date' column
+    - name: Name of the table (e.g. 'orgel')
+    - store_dir: Root directory of the store (default: store)
+    - storage_schema: 'compact' or 'default', STORAGE_SCHEMA if None (default: None)
+    """
+    storage_schema = storage_schema or STORAGE_SCHEMA
+    path = os.path.join(store_dir, name)
+    temp_path = path + '.tmp'
+    if os.path.exists(temp_path):
+        shutil.rmtree(temp_path)
+
+    table = _to_table(df, storage_schema)
+    ds.write_dataset(table, temp_path, format='parquet', partitioning=MONTH_PARTITIONING,
+                     basename_template='part-{i}.parquet', file_options=_write_options(table, storage_schema))
+    if table.num_rows == 0:
+        # write_dataset writes no files for a table without rows, one empty file keeps the schema for the readers
+        os.makedirs(temp_path)
+        pq.write_table(table.drop_columns(['month']), os.path.join(temp_path, 'part-0.parquet'))
+
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(temp_path, path)
+
+def _needs_rescale(df, schema):
+    """
+    Whether a scaled integer column of a stored table cannot hold the values of df without rounding them.
+    """
+    for name in df.columns:
+        scale = _scale(schema.field(name)) if name in schema.names else None
+        if scale:
+            value_scale = _value_scale(df[name].to_numpy(dtype=float))
+            if value_scale is None or value_scale > scale:
+                return True
+    return False
+
+def append_partitioned(df, name, store_dir=STORE_DIR):
+    """
+    Append rows to a month-partitioned sensor table without rewriting it.
+
+    The rows are written as new files into their month partitions, with the column types of the stored table.
+    Only if a scaled integer column of the compact schema cannot hold the new values exactly, the table is
+    rewritten with them, at the larger scale or as floats.
+    The table directory is touched afterwards, so the signature used by data_access changes and cached windows
+    are reloaded.
+
+    Parameters:
+    - df: DataFrame with a 'date' column and the columns of the stored table, dated after the stored rows
+    - name: Name of the table (e.g. 'orgel')
+    - store_dir: Root directory of the store (default: store)
+    """
+    path = os.path.join(store_dir, name)
+    if not os.path.isdir(path):
+        # Start the store from the flat parquet file if there is one, so it is not shadowed by the new rows
+        if os.path.exists(f'{name}.parquet'):
+            df = pd.concat([pd.read_parquet(f'{name}.parquet', engine='pyarrow'), df], ignore_index=True)
+        write_partitioned(df, name, store_dir)
+        return
+
+    dataset, _ = _open_dataset(name, store_dir)
+    if _needs_rescale(df, dataset.schema):
+        stored_df = read_range(name, pd.Timestamp.min, pd.Timestamp.max, store_dir=store_dir, dtype=np.float64)
+        write_partitioned(pd.concat([stored_df, df], ignore_index=True), name, store_dir)
+        return
+    table = _to_table(df, STORAGE_SCHEMA, dataset.schema)
+    # Files are read in path order: update-* sorts after part-*, and the timestamp keeps later appends last
+    ds.write_dataset(table, path, format='parquet', partitioning=MONTH_PARTITIONING,
+                     basename_template=f'update-{time.time_ns()}-{{i}}.parquet',
+                     existing_data_behavior='overwrite_or_ignore', file_options=_write_options(table, STORAGE_SCHEMA))
+    os.utime(path)
+
+def replace_from(df, name, start_date, store_dir=STORE_DIR):
+    """
+    Replace the rows of a month-partitioned table dated from start_date on, e.g. the last buckets of a rollup.
+
+    Only the month partitions from the month of start_date on are rewritten, the rows of that month before
+    start_date are kept. Each partition is written next to the old one and swapped in afterwards.
+
+    Parameters:
+    - df: DataFrame with a 'date' column and the columns of the stored table, dated from start_date on
+    - name: Name of the table (e.g. 'orgel_hour')
+    - start_date: First date to replace
+    - store_dir: Root directory of the store (default: store)
+    """
+    path = os.path.join(store_dir, name)
+    if not os.path.isdir(path):
+        write_partitioned(df, name, store_dir)
+        return
+
+    start_date = pd.Timestamp(start_date)
+    start_month = start_date.strftime('%Y-%m')
+    month_start = start_date.to_period('M').start_time
+    kept_df = read_range(name, month_start, start_date, store_dir=store_dir, dtype=np.float64)
+    df = pd.concat([kept_df, df], ignore_index=True)
+    dataset, _ = _open_dataset(name, store_dir)
+    if _needs_rescale(df, dataset.schema):
+        stored_df = read_range(name, pd.Timestamp.min, month_start, store_dir=store_dir, dtype=np.float64)
+        write_partitioned(pd.concat([stored_df, df], ignore_index=True), name, store_dir)
+        return
+
+    temp_path = path + '.tmp'
+    if os.path.exists(temp_path):
+        shutil.rmtree(temp_path)
+    table = _to_table(df, STORAGE_SCHEMA, dataset.schema)
+    ds.write_dataset(table, temp_path, format='parquet', partitioning=MONTH_PARTITIONING,
+                     basename_template='part-{i}.parquet', file_options=_write_options(table, STORAGE_SCHEMA))
+    new_months = os.listdir(temp_path) if os.path.isdir(temp_path) else []
+    for month in os.listdir(path):
+        if month >= f'month={start_month}' and month not in new_months:
+            shutil.rmtree(os.path.join(path, month))
+    for month in new_months:
+        month_path = os.path.join(path, month)
+        if os.path.exists(month_path):
+            os.replace(month_path, month_path + '.old')
+        os.replace(os.path.join(temp_path, month), month_path)
+        if os.path.exists(month_path + '.old'):
+            shutil.rmtree(month_path + '.old')
+    shutil.rmtree(temp_path, ignore_errors=True)
+    os.utime(path)
+
+def count_rows(name, store_dir=STORE_DIR):
+    """
+    Number of rows of a sensor table, from the parquet metadata without reading the data.
+    """
+    dataset, _ = _open_dataset(name, store_dir)
+    return dataset.count_rows()
+
+def _open_dataset(name, store_dir):
+    path = os.path.join(store_dir, name)
+    if os.path.isdir(path):
+        return ds.dataset(path, format='parquet', partitioning=MONTH_PARTITIONING), True
+    # Fall back to the flat parquet file written by older ingests; row group statistics still allow pruning
+    return ds.dataset(f'{name}.parquet', format='parquet'), False
+
+def read_range(name, start_date, end_date, columns=None, store_dir=STORE_DIR, dtype=np.float32):
+    """
+    Read the rows of a sensor table with start_date <= date < end_date.
+
+    Only the month partitions overlapping the range and only the requested columns are read from disk.
+    Scaled integer columns of the compact storage schema are returned as dtype, float32 unless the exact decimal
+    values are needed.
+
+    Parameters:
+    - name: Name of the table (e.g. 'orgel')
+    - start_date: Start of the range (inclusive)
+    - end_date: End of the range (exclusive)
+    - columns: List of columns to read, all if None (default: None)
+    - store_dir: Root directory of the store (default: store)
+    - dtype: Floating point type of the compact integer columns (default: float32)
+
+    Returns:
+    - DataFrame with the selected rows and columns
+    """
+    start_date = pd.Timestamp(start_date)
+    end_date = pd.Timestamp(end_date)
+    dataset, partitioned = _open_dataset(name, store_dir)
+
+    row_filter = (ds.field('date') >= pa.scalar(start_date, type=pa.timestamp('ns'))) & \
+                 (ds.field('date') < pa.scalar(end_date, type=pa.timestamp('ns')))
+    if partitioned:
+        row_filter = (ds.field('month') >= start_date.strftime('%Y-%m')) & \
+                     (ds.field('month') <= end_date.strftime('%Y-%m')) & row_filter
+        if columns is None:
+            columns = [field for field in dataset.schema.names if field != 'month']
+
+    return _decode(dataset.to_table(columns=columns, filter=row_filter), dtype).to_pandas()
+
+def date_bounds(name, store_dir=STORE_DIR):
+    """
+    Get the first and last timestamp of a sensor table.
+
+    For a partitioned table only the first and last month partitions are read.
+
+    Parameters:
+    - name: Name of the table (e.g. 'orgel')
+    - store_dir: Root directory of the store (default: store)
+
+    Returns:
+    - Tuple of (first timestamp, last timestamp)
+    """
+    dataset, partitioned = _open_dataset(name, store_dir)
+    if partitioned:
+        months = sorted(entry.name for entry in os.scandir(os.path.join(store_dir, name)) if entry.is_dir())
+        first = dataset.to_table(columns=['date'], filter=ds.field('month') == months[0][len('month='):])
+        last = dataset.to_table(columns=['date'], filter=ds.field('month') == months[-1][len('month='):])
+        return pd.Timestamp(pc.min(first['date']).as_py()), pd.Timestamp(pc.max(last['date']).as_py())
+
+    dates = dataset.to_table(columns=['date'])['date']
+    return pd.Timestamp(pc.min(dates).as_py()), pd.Timestamp(pc.max(dates).as_py())
+
+def read_last_row(name, store_dir=STORE_DIR):
+    """
+    Get the last stored row of a sensor table, e.g. to continue the slopes of appended rows.
+
+    For a partitioned table only the last month partition is read. Compact columns are returned as float64 with
+    their exact decimal values.
+
+    Parameters:
+    - name: Name of the table (e.g. 'orgel')
+    - store_dir: Root directory of the store (default: store)
+
+    Returns:
+    - Series with the last row, or None if the table does not exist or is empty
+    """
+    path = os.path.join(store_dir, name)
+    if not os.path.isdir(path) and not os.path.exists(f'{name}.parquet'):
+        return None
+    dataset, partitioned = _open_dataset(name, store_dir)
+    if partitioned:
+        months = sorted(entry.name for entry in os.scandir(path) if entry.is_dir())
+        if not months:
+            return None
+        columns = [field for field in dataset.schema.names if field != 'month']
+        table = dataset.to_table(columns=columns, filter=ds.field('month') == months[-1][len('month='):])
+    else:
+        table = dataset.to_table()
+    if table.num_rows == 0:
+        return None
+    return _decode(table.slice(table.num_rows - 1), np.float64).to_pandas().iloc[0]
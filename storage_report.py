@@ -0,0 +1,86 @@
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from sensor_store import write_partitioned, read_range
+from sensor_registry import SENSORS, get_sites, get_site_sensors
+from rollups import build_rollups
+from align_sensors import align_sensors, wide_table_name
+
+# Size on disk, load time and memory of the store tables in the default and the compact storage schema,
+# built from the <name>.parquet files written by init.py, run with: python storage_report.py
+
+STORAGE_SCHEMAS = ('default', 'compact')
+REPEATS = 3
+
+def directory_size(path):
+    """
+    Total size of the files below a directory in bytes.
+    """
+    return sum(os.path.getsize(os.path.join(root, file)) for root, _, files in os.walk(path) for file in files)
+
+def store_tables():
+    """
+    The sensor tables, their rollups and the wide tables of the sites as they are written to the store.
+    """
+    tables = {}
+    frames = {sensor['name']: pd.read_parquet(f"{sensor['name']}.parquet", engine='pyarrow') for sensor in SENSORS}
+    for name, df in frames.items():
+        tables[name] = df
+        for resolution, rollup_df in build_rollups(df).items():
+            tables[f'{name}_{resolution}'] = rollup_df
+    for site in get_sites():
+        site_frames = {sensor['name']: frames[sensor['name']] for sensor in get_site_sensors(site)}
+        tables[wide_table_name(site)] = align_sensors(site_frames)
+    return tables
+
+def measure(df, name, storage_schema, store_dir):
+    """
+    Write a table in a storage schema and read it back completely.
+
+    Returns:
+    - Tuple of (bytes on disk, best load time in seconds, bytes in memory, loaded DataFrame)
+    """
+    write_partitioned(df, name, store_dir, storage_schema)
+    start_date, end_date = df['date'].min(), df['date'].max() + pd.Timedelta(1)
+    load_times = []
+    for _ in range(REPEATS):
+        start_time = time.perf_counter()
+        loaded_df = read_range(name, start_date, end_date, store_dir=store_dir)
+        load_times.append(time.perf_counter() - start_time)
+    memory = int(loaded_df.memory_usage(index=False, deep=True).sum())
+    return directory_size(os.path.join(store_dir, name)), min(load_times), memory, loaded_df
+
+def max_difference(df, loaded_df):
+    """
+    Largest absolute difference of the float columns of two frames with the same rows.
+    """
+    df = df.sort_values('date', kind='stable').reset_index(drop=True)
+    loaded_df = loaded_df.sort_values('date', kind='stable').reset_index(drop=True)
+    columns = [column for column in df.columns if df[column].dtype.kind == 'f']
+    return max((np.nanmax(np.abs(loaded_df[column].to_numpy(float) - df[column].to_numpy())) for column in columns
+                if df[column].notna().any()), default=0.0)
+
+def main():
+    totals = {storage_schema: np.zeros(3) for storage_schema in STORAGE_SCHEMAS}
+    print(f"{'table':<22}" + ''.join(f"{storage_schema + ' ' + unit:>18}" for storage_schema in STORAGE_SCHEMAS
+                                     for unit in ('KB', 'ms', 'memory KB')) + f"{'max diff':>10}")
+    with tempfile.TemporaryDirectory() as store_dir:
+        for name, df in store_tables().items():
+            results = {storage_schema: measure(df, name, storage_schema, os.path.join(store_dir, storage_schema))
+                       for storage_schema in STORAGE_SCHEMAS}
+            row = ''
+            for storage_schema, (size, load_time, memory, _) in results.items():
+                totals[storage_schema] += (size, load_time, memory)
+                row += f"{size / 1024:>18.0f}{load_time * 1e3:>18.1f}{memory / 1024:>18.0f}"
+            print(f"{name:<22}{row}{max_difference(df, results['compact'][3]):>10.1e}")
+
+    default, compact = totals['default'], totals['compact']
+    print(f"{'total':<22}" + ''.join(f"{size / 1024:>18.0f}{load_time * 1e3:>18.1f}{memory / 1024:>18.0f}"
+                                     for size, load_time, memory in (default, compact)))
+    print(f"compact is {default[0] / compact[0]:.2f}x smaller on disk, {default[2] / compact[2]:.2f}x smaller in memory "
+          f"and loads {default[1] / compact[1]:.2f}x as fast")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from openpyxl import load_workbook
+from process_file import calculate_derived_columns
+from online_metrics import derive_batches
+
+# Default positions of the logger columns in the Excel/CSV exports, overridden per sensor in sensor_registry
+DATE_COLUMN = 0
+RH_COLUMN = 3
+TEMP_COLUMN = 5
+DEFAULT_COLUMNS = {'date': DATE_COLUMN, 'rH': RH_COLUMN, 'temp': TEMP_COLUMN}
+
+def _to_batch(dates, temps, rhs, date_format=None):
+    df = pd.DataFrame()
+    df["date"] = pd.to_datetime(pd.Series(dates), format=date_format)
+    df["temp"] = pd.to_numeric(pd.Series(temps), errors='coerce').astype(np.float64)
+    df["rH"] = pd.to_numeric(pd.Series(rhs), errors='coerce').astype(np.float64)
+    return df
+
+def iter_logger_batches(file_path, chunk_size=10000, skip_rows=0, sep=',', decimal='.', date_format=None,
+                        columns=None):
+    """
+    Read the raw logger columns (date, temperature, relative humidity) from an Excel or CSV export in row chunks.
+
+    Excel files are opened in openpyxl read-only mode, so only the current chunk is held in memory.
+    CSV files (*.csv) are read with pandas in chunks, parsing only the three needed columns.
+    Rows without a date (e.g. blank rows) are left out in both formats and are not counted by skip_rows,
+    so skip_rows can be the number of rows ingested before.
+
+    Parameters:
+    - file_path: Path to the Excel or CSV file
+    - chunk_size: Number of rows per batch (default: 10000)
+    - skip_rows: Number of data rows with a date (after the header) to skip (default: 0)
+    - sep: Field separator of CSV exports (default: ',')
+    - decimal: Decimal separator of CSV exports (default: '.')
+    - date_format: Optional strftime format of the timestamps, inferred if None
+    - columns: Dictionary with the positions of the 'date', 'rH' and 'temp' columns (default: DEFAULT_COLUMNS)
+
+    Returns:
+    - Generator of DataFrames with columns date (datetime64), temp and rH (float64)
+    """
+    columns = columns or DEFAULT_COLUMNS
+    date_column, rh_column, temp_column = columns['date'], columns['rH'], columns['temp']
+    if os.path.splitext(file_path)[1].lower() == '.csv':
+        reader = pd.read_csv(file_path, usecols=[date_column, rh_column, temp_column], sep=sep, decimal=decimal,
+                             chunksize=chunk_size)
+        # usecols keeps the file order of the columns
+        position = {column: i for i, column in enumerate(sorted((date_column, rh_column, temp_column)))}
+        for chunk in reader:
+            chunk = chunk[chunk.iloc[:, position[date_column]].notna()]
+            skipped = min(skip_rows, len(chunk))
+            chunk, skip_rows = chunk.iloc[skipped:], skip_rows - skipped
+            if chunk.empty:
+                continue
+            yield _to_batch(chunk.iloc[:, position[date_column]].to_numpy(),
+                            chunk.iloc[:, position[temp_column]].to_numpy(),
+                            chunk.iloc[:, position[rh_column]].to_numpy(),
+                            date_format)
+        return
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.active
+        # Logger exports carry a wrong sheet dimension (A1:A1), which read-only mode would trust
+        sheet.reset_dimensions()
+        dates, temps, rhs = [], [], []
+        for row in sheet.iter_rows(min_row=2, max_col=max(date_column, rh_column, temp_column) + 1,
+                                   values_only=True):
+            if row[date_column] is None:
+                continue
+            if skip_rows:
+                skip_rows -= 1
+                continue
+            dates.append(row[date_column])
+            temps.append(row[temp_column])
+            rhs.append(row[rh_column])
+            if len(dates) == chunk_size:
+                yield _to_batch(dates, temps, rhs, date_format)
+                dates, temps, rhs = [], [], []
+        if dates:
+            yield _to_batch(dates, temps, rhs, date_format)
+    finally:
+        workbook.close()
+
+def stream_file_to_parquet(file_path, parquet_path, calculate_temp_60=False, chunk_size=10000, batches=None,
+                           previous_row=None, on_batch=None, **reader_options):
+    """
+    Stream a logger export into a parquet file batch by batch, calculating the derived columns on the way.
+
+    Peak memory is bounded by chunk_size, independent of the size of the export. An export without data rows
+    gives a parquet file without rows.
+
+    Parameters:
+    - file_path: Path to the Excel or CSV file
+    - parquet_path: Path of the parquet file to write
+    - calculate_temp_60: Whether to calculate temperature for 60% RH (default: False)
+    - chunk_size: Number of rows per batch (default: 10000)
+    - batches: Optional iterable of raw batches to write instead of reading file_path
+    - previous_row: Last already processed row preceding the first batch, used for the slopes (default: None)
+    - on_batch: Optional function called with every processed batch once it is written, e.g. to append it to
+      the store (default: None)
+    - reader_options: Further keyword arguments for iter_logger_batches (skip_rows, sep, decimal, date_format,
+      columns)
+
+    Returns:
+    - Tuple of (number of rows written, last processed row or None)
+    """
+    if batches is None:
+        batches = iter_logger_batches(file_path, chunk_size=chunk_size, **reader_options)
+
+    writer = None
+    rows = 0
+    try:
+        for df in derive_batches(batches, calculate_temp_60, previous_row):
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(parquet_path, table.schema)
+            writer.write_table(table)
+            if on_batch is not None:
+                on_batch(df)
+            rows += len(df)
+            previous_row = df.iloc[-1]
+        if writer is None:
+            # Written with the schema of the derived columns, so readers of the file find all columns
+            empty_df = calculate_derived_columns(_to_batch([], [], []), calculate_temp_60)
+            pq.write_table(pa.Table.from_pandas(empty_df, preserve_index=False), parquet_path)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows, previous_row
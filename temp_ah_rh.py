@@ -1,5 +1,7 @@
 import numpy as np
 import matplotlib.pyplot as plt
+import psychrometrics
+from reading_density import reading_density, draw_density
 
 # Variablen
 temp_grund = 9
@@ -10,44 +12,21 @@ rh_high = 65
 temp_steps = 0.01
 
 # Konstanten
-temperatur_range = np.arange(-15, 46, temp_steps)  # Temperatur von -15 bis 45°C
-absolute_humidity_range = np.linspace(0, 20, 100)  # Absolute Luftfeuchtigkeit von 0 bis 20 g/m³
-
-# Funktion zur Berechnung des Sättigungsdampfdrucks (E_s) mit der Magnus-Formel
-def magnus_formula(temp):
-    temp = np.asarray(temp)  # Sicherstellen, dass temp ein Array ist
-    es = np.where(temp > 0,
-                   288.68 * (1.098 + temp / 100) ** 8.02 / 100,
-                   4.689 * (1.486 + temp / 100) ** 12.3 / 100)
-    return es
-
-# Funktion zur Berechnung der relativen Luftfeuchtigkeit
-def calculate_relative_humidity(temperature, absolute_humidity):
-    es = magnus_formula(temperature)  # Sättigungsdampfdruck in hPa
-    Mw = 18.016  # Molekulargewicht des Wasserdampfs in kg/kmol
-    R = 8314.3  # Universelle Gaskonstante in J/(kmol·K)
-    ea = absolute_humidity * (273.15 + temperature) * R / Mw / 1e5  # Tatsächlicher Dampfdruck in hPa
-    RH = (ea / es) * 100  # Berechnung der relativen Luftfeuchtigkeit
-    return RH
-
-# Funktion zur Berechnung der absoluten Luftfeuchtigkeit
-def calculate_absolute_humidity(temp, rel_humidity):
-    E_s = magnus_formula(temp)
-    E_a = (rel_humidity / 100.0) * E_s
-    Mw = 18.016  # Molekulargewicht des Wasserdampfs in kg/kmol
-    R = 8314.3  # Universelle Gaskonstante in J/(kmol·K)
-    return 1e5 * Mw / R * E_a / (temp + 273.15)  # Absolute Luftfeuchtigkeit in g/m³
+temp_min, temp_max = -15, 46  # Temperatur von -15 bis 45°C
+ah_min, ah_max, ah_points = 0, 20, 100  # Absolute Luftfeuchtigkeit von 0 bis 20 g/m³
+
+# Berechnung der relativen Luftfeuchtigkeit für das Kontur-Plotting in einem Broadcast, nach Auflösung gecacht
+# (Magnus-Formel aus psychrometrics, dieselbe wie bei der Berechnung der Messdaten)
+temperatur_range, absolute_humidity_range, relative_humidity_values = psychrometrics.rh_grid(
+    temp_min, temp_max, temp_steps, ah_min, ah_max, ah_points)
 
 # Berechnung der absoluten Luftfeuchtigkeit für RH = 45% und 70%
-absolute_humidity_low = calculate_absolute_humidity(temperatur_range, rH_low)
-absolute_humidity_high = calculate_absolute_humidity(temperatur_range, rh_high)
+absolute_humidity_low = psychrometrics.absolute_humidity(temperatur_range, rH_low)
+absolute_humidity_high = psychrometrics.absolute_humidity(temperatur_range, rh_high)
 
 # Plotting der Hauptgrafik
 plt.figure(figsize=(8, 6))
 
-# Berechnung der relativen Luftfeuchtigkeit für das Kontur-Plotting
-relative_humidity_values = np.array([[calculate_relative_humidity(t, ah) for ah in absolute_humidity_range] for t in temperatur_range])
-
 # Zeichnen der Konturen der relativen Luftfeuchtigkeit
 RH_levels = [10, 20, 40, 50, 60, 80, 90, 100]
 CS = plt.contour(absolute_humidity_range, temperatur_range, relative_humidity_values, levels=RH_levels, colors='lightgray', linestyles='dashed')
@@ -63,6 +42,20 @@ plt.fill_betweenx(temperatur_range, absolute_humidity_low, absolute_humidity_hig
                   where=(temperatur_range >= temp_grund) & (temperatur_range <= temp_hoch), 
                   color='lightgreen', alpha=0.5, edgecolor='black', linewidth=1.5)
 
+# Schalter für die Dichte der gemessenen Werte (Orgel und Bankreihe), None für den gesamten Zeitraum
+show_readings = True
+readings_sensors = ['orgel', 'bankreihe']
+readings_start, readings_end = None, None
+
+if show_readings:
+    density = reading_density(readings_sensors, readings_start, readings_end,
+                              temp_range=(temp_min, temp_max - 1), ah_range=(ah_min, ah_max), band=(rH_low, rh_high))
+    image = draw_density(density)
+    plt.colorbar(image, label='Anzahl Messwerte')
+    for name, share in density['outside_share'].items():
+        print(f"{name}: {share:.1%} der Messwerte außerhalb {rH_low}-{rh_high}% rH")
+    print(f"Gesamt: {density['total_outside_share']:.1%} von {density['readings']} Messwerten außerhalb")
+
 # Festlegen der spezifischen x-Ticks
 idx_temp_grund = np.argmin(np.abs(temperatur_range - temp_grund))
 idx_temp_hoch = np.argmin(np.abs(temperatur_range - temp_hoch))
@@ -90,13 +83,8 @@ if winter_high_rH:
     abs_point = 7
     T_point = 10
 
-    # Berechnung des Schnittpunkts von abs_point bei RH = 65%
-    crossing_temp = None
-    for temp in temperatur_range:
-        rh_values_at_temp = calculate_relative_humidity(temp, abs_point)
-        if np.isclose(rh_values_at_temp, rh_high, atol=temp_steps):
-            crossing_temp = temp
-            break
+    # Berechnung des Schnittpunkts von abs_point bei RH = 65% (Nullstellensuche)
+    crossing_temp = psychrometrics.crossing_temperature(abs_point, rh_high, temperatur_range[0], temperatur_range[-1])
 
     plt.plot(abs_point, T_point, 'ro')  # Punkt bei (x=7, T=10°C)
     plt.text(abs_point, T_point, f'({abs_point:.2f}, {T_point:.2f})', color='red', fontsize=12, verticalalignment='top')
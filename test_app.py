@@ -0,0 +1,37 @@
+import glob
+import os
+import shutil
+import pytest
+
+AppTest = pytest.importorskip('streamlit.testing.v1').AppTest
+
+# The app must run from the parquet files shipped with the repo, without a store built by init.py,
+# run with: python -m pytest test_app.py
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_FILE = os.path.join(REPO_DIR, 'Laurentius_app.py')
+
+def copy_parquet_files(target_dir, skip=()):
+    """
+    Copy the parquet files of the repo, except the names in skip, into target_dir.
+    """
+    for path in glob.glob(os.path.join(REPO_DIR, '*.parquet')):
+        if os.path.basename(path) not in skip:
+            shutil.copy(path, target_dir)
+
+def run_app():
+    return AppTest.from_file(APP_FILE, default_timeout=120).run()
+
+def test_app_runs_without_store(tmp_path, monkeypatch):
+    copy_parquet_files(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    at = run_app()
+    assert not at.exception
+    assert [checkbox.label for checkbox in at.checkbox if checkbox.label == 'Show Heating Plot']
+
+def test_app_skips_heating_plot_without_heating_tables(tmp_path, monkeypatch):
+    copy_parquet_files(tmp_path, skip=('nutzheiz.parquet', 'grundheiz.parquet'))
+    monkeypatch.chdir(tmp_path)
+    at = run_app()
+    assert not at.exception
+    assert not [checkbox.label for checkbox in at.checkbox if checkbox.label == 'Show Heating Plot']
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+from process_file import calculate_derived_columns
+from online_metrics import derive_readings, derive_batches
+
+# The online calculators must give the same values as the batch path (calculate_derived_columns),
+# run with: python -m pytest test_online_metrics.py
+
+def synthetic_readings(seed=0):
+    """
+    Four days of 15 minute readings around the October DST change, so the local hour 02:00 to 02:45 repeats,
+    with a humid stretch above 60% RH for the temperature for 60% RH.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2023-10-27 00:00', '2023-10-30 23:45', freq='15min', tz='Europe/Berlin')
+    dates = dates.tz_localize(None)
+    n = len(dates)
+    temp = np.round(12 + 4 * np.sin(np.arange(n) / 16) + rng.normal(0, 0.3, n), 1)
+    rh = np.round(np.clip(55 + 15 * np.sin(np.arange(n) / 40) + rng.normal(0, 2, n), 20, 99), 1)
+    return pd.DataFrame({'date': dates, 'temp': temp, 'rH': rh})
+
+def random_batches(df, seed):
+    """
+    Split a frame into consecutive batches of random size between 1 and 50 rows.
+    """
+    edges = np.cumsum(np.random.default_rng(seed).integers(1, 50, size=len(df)))
+    edges = edges[edges < len(df)]
+    return [df.iloc[start:end] for start, end in zip(np.r_[0, edges], np.r_[edges, len(df)])]
+
+def assert_columns_equal(df, expected_df):
+    assert list(df.columns) == list(expected_df.columns)
+    for column in expected_df.columns:
+        np.testing.assert_array_equal(df[column].to_numpy(), expected_df[column].to_numpy(), err_msg=column)
+
+def test_synthetic_readings_cover_dst_and_humid_rows():
+    df = synthetic_readings()
+    assert df['date'].duplicated().sum() == 4
+    assert (df['rH'] > 60).any()
+
+@pytest.mark.parametrize('calculate_temp_60', [False, True])
+def test_derive_readings_matches_batch_path(calculate_temp_60):
+    df = synthetic_readings()
+    expected_df = calculate_derived_columns(df.copy(), calculate_temp_60)
+    readings_df = pd.DataFrame(list(derive_readings(df.itertuples(index=False, name=None), calculate_temp_60)))
+    assert_columns_equal(readings_df, expected_df)
+
+@pytest.mark.parametrize('calculate_temp_60', [False, True])
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_derive_batches_matches_batch_path(calculate_temp_60, seed):
+    df = synthetic_readings()
+    expected_df = calculate_derived_columns(df.copy(), calculate_temp_60)
+    batches_df = pd.concat(derive_batches(random_batches(df, seed), calculate_temp_60), ignore_index=True)
+    assert_columns_equal(batches_df, expected_df)
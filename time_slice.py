@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+# Time zone of the logger clocks, they record local time and repeat 02:00 to 02:45 at the October DST change
+LOGGER_TIMEZONE = 'Europe/Berlin'
+
+def utc_dates(dates):
+    """
+    Convert the local logger timestamps to UTC, so they are unique and increase over the DST changes.
+
+    A timestamp of the repeated hour is taken as summer time at its first occurrence and as winter time at the
+    second, in the order of dates. Timestamps in the skipped hour of the March change are shifted forward.
+
+    Parameters:
+    - dates: Series of local timestamps in logged order
+
+    Returns:
+    - Series of UTC timestamps without time zone
+    """
+    first_pass = (dates.groupby(dates).cumcount() == 0).to_numpy()
+    return (dates.dt.tz_localize(LOGGER_TIMEZONE, ambiguous=first_pass, nonexistent='shift_forward')
+            .dt.tz_convert('UTC').dt.tz_localize(None))
+
+def sort_by_date(df):
+    """
+    Sort a sensor table by the time of its readings so it can be sliced with slice_by_date.
+
+    Rows are ordered by their UTC time (see utc_dates), so the two passes of the repeated hour of the October DST
+    change stay one after the other in logged order. The local dates of the result therefore step back by an hour
+    once after each October change.
+
+    Parameters:
+    - df: DataFrame with a 'date' column in logged order
+
+    Returns:
+    - DataFrame sorted by time with a fresh RangeIndex
+    """
+    if df['date'].is_monotonic_increasing:
+        return df.reset_index(drop=True)
+    order = np.argsort(utc_dates(df['date']).to_numpy(), kind='stable')
+    return df.iloc[order].reset_index(drop=True)
+
+def slice_by_date(df, start_date, end_date):
+    """
+    Select the rows with start_date <= date < end_date from a table sorted by date.
+
+    The bounds are found by binary search and the rows are returned as a positional slice,
+    without building a boolean mask over the whole table. The search runs over the running maximum of the dates,
+    so the second pass of a repeated DST hour is kept together with the first one.
+
+    Parameters:
+    - df: DataFrame sorted by its 'date' column (see sort_by_date)
+    - start_date: Start of the range (inclusive)
+    - end_date: End of the range (exclusive)
+
+    Returns:
+    - DataFrame slice of df
+    """
+    dates = df['date'].to_numpy()
+    if not df['date'].is_monotonic_increasing:
+        dates = np.maximum.accumulate(dates)
+    start, end = dates.searchsorted(np.array([pd.Timestamp(start_date), pd.Timestamp(end_date)], dtype=dates.dtype))
+    return df.iloc[start:end]